@@ -0,0 +1,76 @@
+"""
+    Memory.py
+    ------------------------------------------
+    Allocation check for the search boards.
+
+    Measures with tracemalloc, from the starting position of
+    a headless Game Board, the peak memory of copying the
+    board into an already used search board, and of a depth 3
+    choose_action of the Minimax Agent. The first call of each
+    warms up the board, its spare pieces and the transposition
+    table, only the calls after it are measured, which is the
+    state of a search board during a match.
+
+    Run with:
+        python Memory.py [backend] [copies]
+"""
+
+import sys
+import random
+import tracemalloc
+from data.classes.Board import Board
+from data.classes.agents.MiniMaxPlayer import MinimaxPlayer
+
+BACKENDS = ['simulation', 'bitboard']
+
+
+def peak_above(func, *args) -> int:
+    """Peak traced memory of func(*args) above what was traced before, in bytes."""
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    func(*args)
+    return tracemalloc.get_traced_memory()[1] - base
+
+
+def measure_copies(player: MinimaxPlayer, board: Board, copies: int) -> int:
+    """Peak memory of copying board into the player's search board copies times."""
+    player.create_search_board(board)
+
+    def copy():
+        for _ in range(copies):
+            player.search_board.copy_from_board(board)
+    return peak_above(copy)
+
+
+def measure_search(player: MinimaxPlayer, board: Board) -> int:
+    """Peak memory of the second choose_action on board."""
+    player.choose_action(board)
+    return peak_above(player.choose_action, board)
+
+
+def run_memory(backend: str = 'simulation', copies: int = 1000) -> dict:
+    random.seed(1)
+    board = Board(None, 600, 600)
+    player = MinimaxPlayer('white', backend, depth=3, opening_book=None)
+
+    tracemalloc.start()
+    try:
+        result = {
+            "backend": backend,
+            "copy_peak": measure_copies(player, board, copies),
+            "search_peak": measure_search(player, board),
+        }
+    finally:
+        tracemalloc.stop()
+        player.close()
+
+    print(f"{backend}: copy_from_board x{copies} peak {result['copy_peak'] / 1024:.1f} KB, "
+          f"choose_action depth 3 peak {result['search_peak'] / 1024:.1f} KB")
+    return result
+
+
+if __name__ == '__main__':
+    backends = [sys.argv[1]] if len(sys.argv) > 1 else BACKENDS
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    for backend in backends:
+        run_memory(backend, copies)
@@ -3,10 +3,9 @@
 """
 
 import os
-import json
 import matplotlib.pyplot as plt
 import numpy as np
-import random
+from data.classes.ResultStore import ResultStore, DEFAULT_DATABASE
 
 def visualize_performance_grid(matches, grid_size=(3, 3)):
     """
@@ -54,18 +53,13 @@ def visualize_performance_grid(matches, grid_size=(3, 3)):
     plt.tight_layout()
     plt.show()
 
-def evaluate_performance(directory:str=""):
-    all_matches = []
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            with open(filepath, 'r') as file:
-                data = json.load(file)
-                for match in data:
-                    if match["p1_move_count"] > 20:
-                        all_matches.append(match)
-    
-    sample = random.sample(all_matches, 9)
+def evaluate_performance(directory:str="", database:str=DEFAULT_DATABASE):
+    # Ingest new result files, then sample from the database
+    store = ResultStore(database)
+    store.ingest(directory)
+    matchup = os.path.basename(os.path.normpath(directory))
+    sample = store.sample(9, matchup=matchup, min_moves=21)
+    store.close()
 
     visualize_performance_grid(sample)
 
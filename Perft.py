@@ -0,0 +1,226 @@
+"""
+    Perft.py
+    ------------------------------------------
+    Move generation benchmark and correctness check.
+
+    Counts the leaf nodes of the legal move tree to a fixed
+    depth from a set of standard positions on every backend:
+    the Game Board with its GUI pieces, SimulationBoard and
+    BitboardBoard. Reports nodes per second per backend,
+    compares the totals with the published counts where our
+    rules agree with them, and diffs the per-move (divide)
+    counts of every backend against the Game Board.
+
+    Published counts are only listed up to the depth where
+    en passant or under-promotion first shows up, neither of
+    which is implemented here.
+
+    Run with:
+        python Perft.py [depth]
+"""
+
+import sys
+import time
+from typing import Dict, List, Tuple
+from data.classes.Board import Board
+from data.classes.Simulation import SimulationBoard
+from data.classes.Bitboard import BitboardBoard
+
+Position = Tuple[int, int]
+
+# (name, FEN, published node counts by depth)
+POSITIONS = [
+    ('start', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+     {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     {1: 48}),
+    ('endgame', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     {1: 14, 2: 191}),
+    ('mirrored', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     {1: 6}),
+    ('promotion', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     {}),
+]
+
+BACKENDS = ['board', 'simulation', 'bitboard']
+
+
+def square_name(pos: Position) -> str:
+    """(4, 6) -> 'e2', rank 8 is y = 0 on the Game Board."""
+    return 'abcdefgh'[pos[0]] + str(8 - pos[1])
+
+
+def load_fen(fen: str) -> Board:
+    """
+        Headless Game Board set up from a FEN string. Castling
+        rights become has_moved flags of the Kings and Rooks,
+        pawns off their starting rank count as moved.
+    """
+    placement, turn, castling = fen.split()[:3]
+    config = []
+    for row in placement.split('/'):
+        config.append([])
+        for char in row:
+            if char.isdigit():
+                config[-1].extend([''] * int(char))
+            else:
+                color = 'w' if char.isupper() else 'b'
+                config[-1].append(color + char.upper())
+
+    board = Board(None, 600, 600)
+    for square in board.squares:
+        square.occupying_piece = None
+    board.config = config
+    board.setup_board()
+    board.turn = 'white' if turn == 'w' else 'black'
+
+    unmoved = set()
+    for right, king_pos, rook_pos in [('K', (4, 7), (7, 7)), ('Q', (4, 7), (0, 7)),
+                                      ('k', (4, 0), (7, 0)), ('q', (4, 0), (0, 0))]:
+        if right in castling:
+            unmoved.update([king_pos, rook_pos])
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is None:
+            continue
+        if piece.notation == 'P':
+            piece.has_moved = square.y != (6 if piece.color == 'white' else 1)
+        elif piece.notation in 'KR':
+            piece.has_moved = square.pos not in unmoved
+    board.build_attack_maps()
+    return board
+
+
+class GameBoardPerft:
+    """
+        Gives a Game Board the make/unmake interface of the
+        search boards. The Game Board has no undo, so every
+        move saves the placement and has_moved flags and
+        unmake_move puts them back.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.history = []
+
+    def generate_moves(self) -> List[Tuple[Position, Position]]:
+        return [(from_pos, square.pos)
+                for from_pos, squares in self.board.legal_moves(self.board.turn).items()
+                for square in squares]
+
+    def make_move(self, from_pos: Position, to_pos: Position):
+        board = self.board
+        saved = []
+        for square in board.squares:
+            piece = square.occupying_piece
+            saved.append((square, piece,
+                          None if piece is None else (piece.pos, piece.has_moved)))
+        self.history.append((board.turn, saved))
+        board.get_piece_from_pos(from_pos).move(
+            board, board.get_square_from_pos(to_pos), force=True)
+        board.turn = 'black' if board.turn == 'white' else 'white'
+
+    def unmake_move(self):
+        board = self.board
+        board.turn, saved = self.history.pop()
+        for square, piece, state in saved:
+            square.occupying_piece = piece
+            if piece is not None:
+                piece.pos, piece.has_moved = state
+                piece.x, piece.y = piece.pos
+        board.build_attack_maps()
+
+
+def create_board(backend: str, fen: str):
+    board = load_fen(fen)
+    if backend == 'board':
+        return GameBoardPerft(board)
+    sim_board = SimulationBoard() if backend == 'simulation' else BitboardBoard()
+    sim_board.copy_from_board(board)
+    return sim_board
+
+
+def perft(board, depth: int) -> int:
+    """Leaf nodes of the legal move tree below board, depth plies deep."""
+    moves = board.generate_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for from_pos, to_pos in moves:
+        board.make_move(from_pos, to_pos)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth: int) -> Dict[str, int]:
+    """Perft split by root move, keyed by coordinate notation (e2e4)."""
+    counts = {}
+    for from_pos, to_pos in board.generate_moves():
+        board.make_move(from_pos, to_pos)
+        counts[square_name(from_pos) + square_name(to_pos)] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def diff_divides(expected: Dict[str, int],
+                 actual: Dict[str, int]) -> List[Tuple[str, int, int]]:
+    """Root moves whose counts differ as (move, expected, actual), None if missing."""
+    return [(move, expected.get(move), actual.get(move))
+            for move in sorted(set(expected) | set(actual))
+            if expected.get(move) != actual.get(move)]
+
+
+def run_perft(depth: int = 3, backends: List[str] = BACKENDS,
+              positions: list = POSITIONS) -> List[dict]:
+    """
+        Runs divide on every position and backend, prints the
+        node counts, speed and mismatches, and returns one
+        result per position and backend.
+    """
+    results = []
+    for name, fen, published in positions:
+        print(f"{name}: {fen}")
+        divides = {}
+        for backend in backends:
+            board = create_board(backend, fen)
+            start = time.perf_counter()
+            counts = divide(board, depth)
+            elapsed = time.perf_counter() - start
+            nodes = sum(counts.values())
+            divides[backend] = counts
+
+            result = {
+                "position": name,
+                "backend": backend,
+                "depth": depth,
+                "nodes": nodes,
+                "time": elapsed,
+                "nodes_per_second": nodes / elapsed if elapsed > 0 else 0,
+                "published": published.get(depth),
+                "mismatches": [],
+            }
+            if backend != backends[0]:
+                result["mismatches"] = diff_divides(divides[backends[0]], counts)
+            results.append(result)
+
+            status = ''
+            if result["published"] is not None and nodes != result["published"]:
+                status = f"  expected {result['published']}"
+            print(f"  {backend:<11}{nodes:>10} nodes {elapsed:8.2f}s "
+                  f"{result['nodes_per_second']:>10.0f} nodes/s{status}")
+            for move, expected, actual in result["mismatches"]:
+                print(f"    {move}: {backends[0]} {expected}, {backend} {actual}")
+        print()
+    return results
+
+
+def has_errors(results: List[dict]) -> bool:
+    return any(result["mismatches"] or
+               (result["published"] is not None and result["nodes"] != result["published"])
+               for result in results)
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    sys.exit(1 if has_errors(run_perft(depth)) else 0)
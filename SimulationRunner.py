@@ -1,24 +1,47 @@
-import json
 import time
+import random
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from data.classes.ChessMatch import chess_match
 from data.classes.agents.MiniMaxPlayer import MinimaxPlayer
 from data.classes.agents.RandomPlayer import RandomPlayer
+from data.classes.Results import ResultWriter
 
-def run_match():
-    outcome = chess_match(MinimaxPlayer('white'), MinimaxPlayer('black'))
+def run_match(seed: int = None, search_stats: bool = True):
+    # Agents draw from the global random module, seeding it replays the match
+    if seed is not None:
+        random.seed(seed)
+    # Closing the players shuts down their search worker pools
+    with MinimaxPlayer('white', search_stats=search_stats) as white_player, \
+            MinimaxPlayer('black', search_stats=search_stats) as black_player:
+        outcome = chess_match(white_player, black_player, headless=True)
+    outcome["seed"] = seed
     return outcome
 
-def run_simulation(iterations:int=5):
-    outcomes = []
+def run_simulation(iterations:int=5, workers:int=1, seed:int=None,
+                   batch_size:int=10, search_stats:bool=True):
+    """
+        Plays `iterations` matches, match i seeded with seed + i
+        (seed defaults to the current time). With workers > 1 the
+        matches are spread over a process pool and collected in
+        the order they finish. Every outcome is appended to
+        results_<timestamp>.jsonl as it comes in, flushed every
+        `batch_size` matches. search_stats records the per-move
+        search statistics of the players in every outcome.
+    """
     player_1_wins = 0
     player_2_wins = 0
     draws = 0
-    for i in range(iterations):
+
+    if seed is None:
+        seed = int(time.time())
+    seeds = [seed + i for i in range(iterations)]
+
+    def collect(game: int, sim_outcome: dict):
+        nonlocal player_1_wins, player_2_wins, draws
         print("==============================================")
-        print(f"""              GAME #{i+1}                """)
+        print(f"""              GAME #{game}                """)
         print("==============================================")
-        sim_outcome = run_match()
         print("-------------------OUTCOME--------------------")
         print(sim_outcome)
         print("----------------------------------------------")
@@ -31,13 +54,27 @@ def run_simulation(iterations:int=5):
         else:
             draws += 1
 
-        outcomes.append(sim_outcome)
-    
-    export_simulation_data(outcomes)
+        writer.write(sim_outcome)
 
+    # Closing the writer flushes the last batch, also when a match fails
+    with ResultWriter(results_file_name(), batch_size) as writer:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run_match, match_seed, search_stats): i
+                           for i, match_seed in enumerate(seeds)}
+                for future in as_completed(futures):
+                    collect(futures[future] + 1, future.result())
+        else:
+            for i, match_seed in enumerate(seeds):
+                collect(i + 1, run_match(match_seed, search_stats))
 
-def export_simulation_data(outcome_list: list):
+
+def results_file_name() -> str:
     timestamp = str(int(time.time()))
-    file_name = f"""results_{timestamp}.json"""
-    with open(file_name, 'w') as fout:
-        json.dump(outcome_list , fout)
+    return f"""results_{timestamp}.jsonl"""
+
+
+def export_simulation_data(outcome_list: list):
+    with ResultWriter(results_file_name(), batch_size=max(len(outcome_list), 1)) as writer:
+        for outcome in outcome_list:
+            writer.write(outcome)
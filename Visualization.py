@@ -2,101 +2,96 @@
     Script to generate Visualizations
 """
 import os
-import json
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from data.classes.ResultStore import ResultStore, DEFAULT_DATABASE
 
 
-def aggregate_data(directory: str):
+def load_outcomes(store: ResultStore, matchup: str = None):
     """
-        Aggregates the results from individual simulation
-        outcome JSON files.
+        Matches of matchup (every matchup if None) as a
+        DataFrame in ingest order, and their move time logs as
+        lists keyed by (match id, player).
     """
-    all_results = []
-    aggregate = {}
-
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            with open(filepath, 'r') as file:
-                data = json.load(file)  # Use json.load instead of json.loads
-                # print(data)
-                all_results.extend(data)
-
-    p1_win_count = 0
-    p1_lose_count = 0
-    p2_win_count = 0
-    p2_lose_count = 0
-    draw_count = 0
-    p1_captures_per_match = []
-    p2_captures_per_match = []
-    p1_points_per_match = []
-    p2_points_per_match = []
-    avg_captures_per_turn_p1 = []
-    avg_captures_per_turn_p2 = []
-    avg_points_per_turn_p1 = []
-    avg_points_per_turn_p2 = []
-    p1_points = 0
-    p2_points = 0
-    p1_capture_count = 0
-    p2_capture_count = 0
-    p1_time_log = []
-    p2_time_log = []
-
-    total_matches = len(all_results)
-
-    for outcome in all_results:
-        if outcome["winner"] == 'W':
-            p1_win_count += 1
-            p2_lose_count += 1
-            p1_points += outcome["p1_points"]
-            p1_capture_count += outcome["p1_capture_count"]
-            p1_points_per_match.append(outcome["p1_points"])
-            p1_captures_per_match.append(outcome["p1_capture_count"])
-            avg_captures_per_turn_p1.append(outcome["p1_capture_count"] /
-                                            outcome["p1_move_count"])
-            avg_points_per_turn_p1.append(outcome["p1_points"] /
-                                          outcome["p1_move_count"])
-            p1_time_log.append(outcome.get("p1_time_log",None))
-        elif outcome["winner"] == 'B':
-            p2_win_count += 1
-            p1_lose_count += 1
-            p2_points += outcome["p2_points"]
-            p2_capture_count += outcome["p2_capture_count"]
-            p2_points_per_match.append(outcome["p2_points"])
-            p2_captures_per_match.append(outcome["p2_capture_count"])
-            avg_captures_per_turn_p2.append(outcome["p2_capture_count"] /
-                                            outcome["p2_move_count"])
-            avg_points_per_turn_p2.append(outcome["p2_points"] /
-                                          outcome["p2_move_count"])
-            p2_time_log.append(outcome.get("p2_time_log",None))
-        elif outcome["winner"] is None or outcome["is_draw"] is True:
-            draw_count += 1
-
-    aggregate["p1_win_count"] = p1_win_count
-    aggregate["p1_lose_count"] = p1_lose_count
-    aggregate["p2_win_count"] = p2_win_count
-    aggregate["p2_lose_count"] = p2_lose_count
-    aggregate["p1_captures_per_match"] = p1_captures_per_match
-    aggregate["p1_points_per_match"] = p1_points_per_match
-    aggregate["p2_captures_per_match"] = p2_captures_per_match
-    aggregate["p2_points_per_match"] = p2_points_per_match
-    aggregate["draw_count"] = draw_count
-    aggregate["avg_captures_per_turn_p1"] = avg_captures_per_turn_p1
-    aggregate["avg_captures_per_turn_p2"] = avg_captures_per_turn_p2
-    aggregate["avg_points_per_turn_p1"] = avg_points_per_turn_p1
-    aggregate["avg_points_per_turn_p2"] = avg_points_per_turn_p2
-    aggregate["p1_points"] = p1_points
-    aggregate["p2_points"] = p2_points
-    aggregate["p1_capture_count"] = p1_capture_count
-    aggregate["p2_capture_count"] = p2_capture_count
-    aggregate["total_matches"] = total_matches
-    aggregate["avg_points_per_match_p1"] = p1_points / total_matches
-    aggregate["avg_points_per_match_p2"] = p2_points / total_matches
-    aggregate["avg_captures_per_match_p1"] = p1_capture_count / total_matches
-    aggregate["avg_captures_per_match_p2"] = p2_capture_count / total_matches
-    aggregate["p1_time_log"] = p1_time_log
-    aggregate["p2_time_log"] = p2_time_log
+    clause, parameters = store.where(matchup=matchup)
+    frame = pd.read_sql_query(f"SELECT * FROM matches{clause} ORDER BY id",
+                              store.connection, params=parameters)
+    times = pd.read_sql_query(
+        "SELECT match_id, player, seconds FROM move_times "
+        f"WHERE match_id IN (SELECT id FROM matches{clause}) "
+        "ORDER BY match_id, player, ply",
+        store.connection, params=parameters)
+    time_logs = times.groupby(["match_id", "player"])["seconds"].agg(list)
+    return frame, time_logs
+
+
+def summarize(frame: pd.DataFrame, by: str) -> pd.DataFrame:
+    """
+        Count metrics and per match averages for every value of
+        column `by`. Points and captures of a player are only
+        counted in the matches that player won.
+    """
+    p1_win, p2_win = frame["p1_win"], frame["p2_win"]
+    counts = pd.DataFrame({
+        "total_matches": 1,
+        "p1_win_count": p1_win,
+        "p1_lose_count": p2_win,
+        "p2_win_count": p2_win,
+        "p2_lose_count": p1_win,
+        "draw_count": frame["draw"],
+        "p1_points": frame["p1_points"].where(p1_win, 0),
+        "p2_points": frame["p2_points"].where(p2_win, 0),
+        "p1_capture_count": frame["p1_capture_count"].where(p1_win, 0),
+        "p2_capture_count": frame["p2_capture_count"].where(p2_win, 0),
+    }, index=frame.index).astype(int)
+    sums = counts.groupby(frame[by]).sum()
+    for player in ("p1", "p2"):
+        sums[f"avg_points_per_match_{player}"] = \
+            sums[f"{player}_points"] / sums["total_matches"]
+        sums[f"avg_captures_per_match_{player}"] = \
+            sums[f"{player}_capture_count"] / sums["total_matches"]
+    return sums
+
+
+def aggregate_data(directory: str = None, database: str = DEFAULT_DATABASE):
+    """
+        Aggregates the results of a matchup directory, or of every
+        matchup in the results database if directory is None.
+        New result files are ingested into the database first.
+        Metrics are computed column-wise on a DataFrame of the
+        matches, with breakdowns by matchup and by end status.
+    """
+    store = ResultStore(database)
+    matchup = None
+    if directory is not None:
+        store.ingest(directory)
+        matchup = os.path.basename(os.path.normpath(directory))
+    frame, time_logs = load_outcomes(store, matchup)
+    store.close()
+    assert (len(frame) > 0)
+
+    frame["p1_win"] = frame["winner"] == 'W'
+    frame["p2_win"] = frame["winner"] == 'B'
+    frame["draw"] = ~frame["p1_win"] & ~frame["p2_win"] & \
+        (frame["winner"].isna() | frame["is_draw"].astype(bool))
+    # the totals are the summary of a single group holding every match
+    frame["all"] = 0
+    aggregate = summarize(frame, "all").to_dict(orient='index')[0]
+
+    # Per match lists, taken from the matches each player won
+    for player, won in (("p1", frame[frame["p1_win"]]), ("p2", frame[frame["p2_win"]])):
+        aggregate[f"{player}_captures_per_match"] = won[f"{player}_capture_count"].tolist()
+        aggregate[f"{player}_points_per_match"] = won[f"{player}_points"].tolist()
+        aggregate[f"avg_captures_per_turn_{player}"] = \
+            (won[f"{player}_capture_count"] / won[f"{player}_move_count"]).tolist()
+        aggregate[f"avg_points_per_turn_{player}"] = \
+            (won[f"{player}_points"] / won[f"{player}_move_count"]).tolist()
+        aggregate[f"{player}_time_log"] = [time_logs.get((match_id, int(player[1])), [])
+                                           for match_id in won["id"]]
+
+    aggregate["by_matchup"] = summarize(frame, "matchup").to_dict(orient='index')
+    aggregate["by_end_status"] = summarize(frame, "game_end_status").to_dict(orient='index')
 
     for key, value in aggregate.items():
         print(key, value)
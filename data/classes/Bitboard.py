@@ -0,0 +1,576 @@
+"""
+    Bitboard.py
+    ------------------------------------------
+    Bitboard based board used as a fast search backend.
+
+    Every piece type of every color is kept in one 64 bit
+    integer, bit `y * 8 + x` standing for square (x, y) of
+    the Game Board. Knight, King and Pawn attacks come from
+    tables precomputed at import. Sliding attacks are looked
+    up as well: for every square and line through it (file,
+    rank and both diagonals) a table maps each arrangement of
+    pieces on the line to the squares attacked along it.
+    Moves are made legal with the check and pin masks of the
+    King and the opponent's attacks, computed once per
+    position; no move is played to find out whether it is
+    legal.
+
+    The public interface mirrors SimulationBoard: moves are
+    exchanged as ((x1, y1), (x2, y2)) position pairs and
+    `handle_move` validates a move before playing it.
+"""
+
+from typing import Literal, List, Tuple
+from data.classes.Evaluation import SQUARE_VALUES
+from data.classes.Geometry import DIRECTIONS, KNIGHT_JUMPS, KING_JUMPS, \
+    PAWN_CAPTURES, RAYS as SQUARE_RAYS
+from data.classes.Move import CAPTURE, SQUARE_POS
+from data.classes.Zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, \
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLORS = ['white', 'black']
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+NOTATIONS = ['P', 'N', 'B', 'R', 'Q', 'K']
+NOTATION_INDEX = {'P': PAWN, 'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN,
+                  'K': KING}
+
+# Whether walking a direction of Geometry.DIRECTIONS increases the square index
+POSITIVE = [dy > 0 or (dy == 0 and dx > 0) for dx, dy in DIRECTIONS]
+
+
+def _mask(squares: Tuple[int, ...]) -> int:
+    bb = 0
+    for sq in squares:
+        bb |= 1 << sq
+    return bb
+
+
+# Masks of the Geometry tables, indexed by square
+KNIGHT_ATTACKS = [_mask(targets) for targets in KNIGHT_JUMPS]
+KING_ATTACKS = [_mask(targets) for targets in KING_JUMPS]
+# White pawns move towards y = 0, black pawns towards y = 7
+PAWN_ATTACKS = [[_mask(targets) for targets in PAWN_CAPTURES[color]]
+                for color in COLORS]
+# RAYS[d][sq], squares from sq towards the edge in direction d
+RAYS = [[_mask(SQUARE_RAYS[sq][d]) for sq in range(64)]
+        for d in range(len(DIRECTIONS))]
+
+PAWN_START_RANK = [6, 1]
+PROMOTION_RANK = [0, 7]
+PAWN_PUSH = [-8, 8]
+
+# Castling: (right, king from, king to, rook from, rook to, empty squares)
+CASTLING = [
+    (WHITE_KINGSIDE, 60, 62, 63, 61, (61, 62)),
+    (WHITE_QUEENSIDE, 60, 58, 56, 59, (57, 58, 59)),
+    (BLACK_KINGSIDE, 4, 6, 7, 5, (5, 6)),
+    (BLACK_QUEENSIDE, 4, 2, 0, 3, (1, 2, 3)),
+]
+# Rights lost when a piece leaves or is captured on a square
+CASTLING_MASK = [0b1111] * 64
+CASTLING_MASK[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[63] &= ~WHITE_KINGSIDE
+CASTLING_MASK[56] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[7] &= ~BLACK_KINGSIDE
+CASTLING_MASK[0] &= ~BLACK_QUEENSIDE
+
+
+def first_blocker(blockers: int, d: int) -> int:
+    # nearest of the blockers on a ray walked in direction d
+    if POSITIVE[d]:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def slide_attacks(sq: int, occupied: int, directions: List[int]) -> int:
+    attacks = 0
+    for d in directions:
+        ray = RAYS[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[d][first_blocker(blockers, d)]
+        attacks |= ray
+    return attacks
+
+
+def line_table(direction: Tuple[int, int]) -> Tuple[List[int], List[dict]]:
+    """
+        Per square, the mask of the line through it along
+        direction and its opposite, and the attacks along the
+        line for every subset of the mask as occupancy.
+    """
+    directions = [DIRECTIONS.index(direction),
+                  DIRECTIONS.index((-direction[0], -direction[1]))]
+    masks, tables = [], []
+    for sq in range(64):
+        mask = RAYS[directions[0]][sq] | RAYS[directions[1]][sq]
+        table = {}
+        # every subset of mask, walked with the carry-rippler trick
+        subset = 0
+        while True:
+            table[subset] = slide_attacks(sq, subset, directions)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+def between_table() -> List[List[int]]:
+    """Per pair of squares, the squares strictly between them on a line, 0 off a line."""
+    between = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for ray in SQUARE_RAYS[sq]:
+            for i, target in enumerate(ray):
+                between[sq][target] = _mask(ray[:i])
+    return between
+
+
+# Occupancy-masked slider lookups along files, ranks, ne-sw and se-nw diagonals
+FILE_MASKS, FILE_ATTACKS = line_table((0, -1))
+RANK_MASKS, RANK_ATTACKS = line_table((1, 0))
+DIAGONAL_MASKS, DIAGONAL_ATTACKS = line_table((1, -1))
+ANTI_DIAGONAL_MASKS, ANTI_DIAGONAL_ATTACKS = line_table((1, 1))
+BETWEEN = between_table()
+
+FULL = (1 << 64) - 1
+NOT_FILE_A = _mask(tuple(sq for sq in range(64) if sq % 8 != 0))
+NOT_FILE_H = _mask(tuple(sq for sq in range(64) if sq % 8 != 7))
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    return DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASKS[sq]] \
+        | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASKS[sq]]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    return FILE_ATTACKS[sq][occupied & FILE_MASKS[sq]] \
+        | RANK_ATTACKS[sq][occupied & RANK_MASKS[sq]]
+
+
+def pawn_attacks(pawns: int, color: int) -> int:
+    # all squares the pawns of color capture on, White towards y = 0
+    if color == WHITE:
+        return (pawns & NOT_FILE_A) >> 9 | (pawns & NOT_FILE_H) >> 7
+    return ((pawns & NOT_FILE_A) << 7 | (pawns & NOT_FILE_H) << 9) & FULL
+
+
+def squares_of(bb: int):
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+class BitboardBoard:
+
+    def __init__(self):
+        self.config = [
+            ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR'],
+            ['bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP'],
+            ['', '', '', '', '', '', '', ''],
+            ['', '', '', '', '', '', '', ''],
+            ['', '', '', '', '', '', '', ''],
+            ['', '', '', '', '', '', '', ''],
+            ['wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP'],
+            ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR'],
+        ]
+        self.clear()
+        self.setup_board()
+
+    @property
+    def turn(self) -> Literal['white', 'black']:
+        return COLORS[self.side]
+
+    @turn.setter
+    def turn(self, color: Literal['white', 'black']):
+        self.set_side(COLOR_INDEX[color])
+
+    def clear(self):
+        self.pieces: List[List[int]] = [[0] * 6, [0] * 6]
+        self.occupancy: List[int] = [0, 0]
+        # Piece code (color * 6 + piece type) per square, -1 when empty
+        self.mailbox: List[int] = [-1] * 64
+        self.side = WHITE
+        self.castling = 0
+        self.history: List[tuple] = []
+        # Zobrist key, kept up to date by put_piece/remove_piece and push/pop
+        self.hash = CASTLING_KEYS[0]
+        # Material and piece-square score of White and Black
+        self.scores: List[int] = [0, 0]
+
+    def put_piece(self, sq: int, color: int, ptype: int):
+        bit = 1 << sq
+        self.pieces[color][ptype] |= bit
+        self.occupancy[color] |= bit
+        self.mailbox[sq] = color * 6 + ptype
+        self.hash ^= PIECE_KEYS[color * 6 + ptype][sq]
+        self.scores[color] += SQUARE_VALUES[color * 6 + ptype][sq]
+
+    def remove_piece(self, sq: int):
+        code = self.mailbox[sq]
+        color, ptype = divmod(code, 6)
+        bit = 1 << sq
+        self.pieces[color][ptype] ^= bit
+        self.occupancy[color] ^= bit
+        self.mailbox[sq] = -1
+        self.hash ^= PIECE_KEYS[code][sq]
+        self.scores[color] -= SQUARE_VALUES[code][sq]
+
+    def setup_board(self):
+        for y, row in enumerate(self.config):
+            for x, piece in enumerate(row):
+                if piece != '':
+                    color = WHITE if piece[0] == 'w' else BLACK
+                    self.put_piece(y * 8 + x, color, NOTATION_INDEX[piece[1]])
+        self.set_castling(0b1111)
+
+    def set_castling(self, castling: int):
+        self.hash ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+        self.castling = castling
+
+    def set_side(self, side: int):
+        if side != self.side:
+            self.hash ^= SIDE_KEY
+        self.side = side
+
+    def copy_from_board(self, board):
+        """
+            Copies a Game Board, a SimulationBoard or another
+            BitboardBoard. Castling rights are taken from the
+            `has_moved` flags of the Kings and Rooks.
+        """
+        if isinstance(board, BitboardBoard):
+            self.pieces = [board.pieces[WHITE][:], board.pieces[BLACK][:]]
+            self.occupancy = board.occupancy[:]
+            self.mailbox = board.mailbox[:]
+            self.side = board.side
+            self.castling = board.castling
+            self.hash = board.hash
+            self.scores = board.scores[:]
+            self.history = []
+            return
+
+        self.clear()
+        self.turn = board.turn
+        unmoved = set()
+        for square in board.squares:
+            piece = square.occupying_piece
+            if piece is not None:
+                color = COLOR_INDEX[piece.color]
+                self.put_piece(square.y * 8 + square.x, color,
+                               NOTATION_INDEX[piece.notation])
+                if not piece.has_moved:
+                    unmoved.add((square.x, square.y))
+
+        castling = 0
+        for right, king_from, _, rook_from, _, _ in CASTLING:
+            color = WHITE if king_from == 60 else BLACK
+            if SQUARE_POS[king_from] in unmoved \
+                and SQUARE_POS[rook_from] in unmoved \
+                    and self.mailbox[king_from] == color * 6 + KING \
+                    and self.mailbox[rook_from] == color * 6 + ROOK:
+                castling |= right
+        self.set_castling(castling)
+
+    def is_square_attacked(self, sq: int, by: int, occupied: int = None) -> bool:
+        # occupied overrides the board's occupancy, to look through a piece
+        pieces = self.pieces[by]
+        if KNIGHT_ATTACKS[sq] & pieces[KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & pieces[KING]:
+            return True
+        # a pawn of `by` attacks sq from where an opposing pawn on sq would
+        if PAWN_ATTACKS[by ^ 1][sq] & pieces[PAWN]:
+            return True
+        if occupied is None:
+            occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        if bishop_attacks(sq, occupied) & (pieces[BISHOP] | pieces[QUEEN]):
+            return True
+        if rook_attacks(sq, occupied) & (pieces[ROOK] | pieces[QUEEN]):
+            return True
+        return False
+
+    def attacks_of(self, color: int, occupied: int) -> int:
+        """Bitboard of every square a piece of color attacks, given the occupancy."""
+        pieces = self.pieces[color]
+        attacks = pawn_attacks(pieces[PAWN], color)
+        if pieces[KING]:
+            attacks |= KING_ATTACKS[pieces[KING].bit_length() - 1]
+        for sq in squares_of(pieces[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in squares_of(pieces[BISHOP] | pieces[QUEEN]):
+            attacks |= bishop_attacks(sq, occupied)
+        for sq in squares_of(pieces[ROOK] | pieces[QUEEN]):
+            attacks |= rook_attacks(sq, occupied)
+        return attacks
+
+    def king_square(self, color: int) -> int:
+        return self.pieces[color][KING].bit_length() - 1
+
+    def is_in_check(self, color: Literal['white', 'black']) -> bool:
+        color = COLOR_INDEX[color]
+        return self.is_square_attacked(self.king_square(color), color ^ 1)
+
+    def is_in_checkmate(self, color: Literal['white', 'black']) -> bool:
+        return self.is_in_check(color) and not self.generate_moves(color)
+
+    def targets_from(self, sq: int, attacked: int = None) -> int:
+        """
+            Bitboard of the pseudo-legal destinations of the piece on
+            sq. attacked, the opponent's attacks when already known,
+            saves looking up the squares castling must not cross.
+        """
+        color, ptype = divmod(self.mailbox[sq], 6)
+        own = self.occupancy[color]
+        occupied = own | self.occupancy[color ^ 1]
+
+        if ptype == PAWN:
+            targets = PAWN_ATTACKS[color][sq] & self.occupancy[color ^ 1]
+            forward = sq + PAWN_PUSH[color]
+            if not occupied >> forward & 1:
+                targets |= 1 << forward
+                double = forward + PAWN_PUSH[color]
+                if sq // 8 == PAWN_START_RANK[color] \
+                        and not occupied >> double & 1:
+                    targets |= 1 << double
+            return targets
+        if ptype == KNIGHT:
+            return KNIGHT_ATTACKS[sq] & ~own
+        if ptype == BISHOP:
+            return bishop_attacks(sq, occupied) & ~own
+        if ptype == ROOK:
+            return rook_attacks(sq, occupied) & ~own
+        if ptype == QUEEN:
+            return (bishop_attacks(sq, occupied)
+                    | rook_attacks(sq, occupied)) & ~own
+
+        targets = KING_ATTACKS[sq] & ~own
+        for right, king_from, king_to, _, rook_to, empty in CASTLING:
+            if self.castling & right and king_from == sq \
+                    and all(self.mailbox[s] == -1 for s in empty):
+                if attacked is not None:
+                    safe = not attacked & (1 << sq | 1 << rook_to)
+                else:
+                    safe = not self.is_square_attacked(sq, color ^ 1) \
+                        and not self.is_square_attacked(rook_to, color ^ 1)
+                if safe:
+                    targets |= 1 << king_to
+        return targets
+
+    def pseudo_legal_moves(self, color: int) -> List[Tuple[int, int]]:
+        return [(frm, to) for frm in squares_of(self.occupancy[color])
+                for to in squares_of(self.targets_from(frm))]
+
+    def king_lines(self, color: int) -> Tuple[int, int, dict]:
+        """
+            Checkers of color's King, the check mask (the checkers
+            and the squares between a checking slider and the King)
+            and the pin mask of every pinned piece by its square:
+            the line from the King to the pinning slider.
+        """
+        king = self.king_square(color)
+        enemy = self.pieces[color ^ 1]
+        own = self.occupancy[color]
+        occupied = own | self.occupancy[color ^ 1]
+        between = BETWEEN[king]
+        checkers = KNIGHT_ATTACKS[king] & enemy[KNIGHT] \
+            | PAWN_ATTACKS[color][king] & enemy[PAWN]
+        check_mask = checkers
+        pins = {}
+        # Sliders seen from the King, then the ones seen through one own piece
+        for attacks, sliders in ((bishop_attacks, enemy[BISHOP] | enemy[QUEEN]),
+                                 (rook_attacks, enemy[ROOK] | enemy[QUEEN])):
+            if not sliders:
+                continue
+            seen = attacks(king, occupied)
+            for sq in squares_of(seen & sliders):
+                checkers |= 1 << sq
+                check_mask |= between[sq] | 1 << sq
+            for sq in squares_of(attacks(king, occupied ^ (seen & own)) & ~seen & sliders):
+                line = between[sq]
+                pins[(line & own).bit_length() - 1] = line | 1 << sq
+        return checkers, check_mask, pins
+
+    def legal_moves(self, color: int, captures_only: bool = False) -> List[Tuple[int, int]]:
+        return self.legal_moves_and_checkers(color, captures_only)[0]
+
+    def legal_moves_and_checkers(self, color: int,
+                                 captures_only: bool = False) -> Tuple[List[Tuple[int, int]], int]:
+        """
+            Legal moves of color from the check and pin masks of its
+            King: in check other pieces must land on the check mask
+            (in double check only the King moves), pinned pieces stay
+            on their pin line and the King may not step onto an
+            attacked square. The opponent's attacks are computed once,
+            looking through the King itself, and only when the King
+            has somewhere to go. The checkers bitboard is returned
+            with the moves.
+        """
+        if not self.pieces[color][KING]:
+            # No King to protect, every pseudo-legal move goes
+            return [(frm, to) for frm, to in self.pseudo_legal_moves(color)
+                    if not captures_only or self.mailbox[to] != -1], 0
+        king = self.king_square(color)
+        checkers, check_mask, pins = self.king_lines(color)
+        double_check = checkers & (checkers - 1)
+        enemy = self.occupancy[color ^ 1]
+        # occupancy with the King lifted off, so it cannot hide behind itself
+        occupied = (self.occupancy[color] | enemy) ^ (1 << king)
+        moves = []
+        for frm in squares_of(self.occupancy[color]):
+            if frm == king:
+                targets = KING_ATTACKS[king] & (enemy if captures_only else ~self.occupancy[color])
+                if targets or (self.castling and not captures_only):
+                    attacked = self.attacks_of(color ^ 1, occupied)
+                    if not captures_only:
+                        # steps and castling
+                        targets = self.targets_from(frm, attacked)
+                    moves.extend((frm, to) for to in squares_of(targets & ~attacked))
+                continue
+            if double_check:
+                continue
+            targets = self.targets_from(frm)
+            if captures_only:
+                targets &= enemy
+            if checkers:
+                targets &= check_mask
+            if frm in pins:
+                targets &= pins[frm]
+            # squares_of inlined, this loop makes every move of the search
+            while targets:
+                lsb = targets & -targets
+                moves.append((frm, lsb.bit_length() - 1))
+                targets ^= lsb
+        return moves, checkers
+
+    def generate_moves(
+        self, color: Literal['white', 'black'] = None
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        if color is None:
+            color = self.turn
+        return [(SQUARE_POS[frm], SQUARE_POS[to])
+                for frm, to in self.legal_moves(COLOR_INDEX[color])]
+
+    def legal_captures(self, color: int) -> List[Tuple[int, int]]:
+        return self.legal_moves(color, captures_only=True)
+
+    def generate_captures(
+        self, color: Literal['white', 'black'] = None
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        if color is None:
+            color = self.turn
+        return [(SQUARE_POS[frm], SQUARE_POS[to])
+                for frm, to in self.legal_captures(COLOR_INDEX[color])]
+
+    def generate_packed_moves(self, color: Literal['white', 'black'] = None,
+                              captures_only: bool = False) -> List[int]:
+        """Legal moves (or only captures) of color as packed integers, see Move.py."""
+        side = COLOR_INDEX[self.turn if color is None else color]
+        if captures_only:
+            return [frm | to << 6 | CAPTURE for frm, to in self.legal_captures(side)]
+        mailbox = self.mailbox
+        return [frm | to << 6 | (CAPTURE if mailbox[to] != -1 else 0)
+                for frm, to in self.legal_moves(side)]
+
+    def generate_packed_moves_and_check(
+            self, color: Literal['white', 'black'] = None) -> Tuple[List[int], bool]:
+        """Legal moves of color as packed integers, and whether color is in check."""
+        side = COLOR_INDEX[self.turn if color is None else color]
+        moves, checkers = self.legal_moves_and_checkers(side)
+        mailbox = self.mailbox
+        return [frm | to << 6 | (CAPTURE if mailbox[to] != -1 else 0)
+                for frm, to in moves], checkers != 0
+
+    def notation_at(self, sq: int) -> str | None:
+        code = self.mailbox[sq]
+        return None if code == -1 else NOTATIONS[code % 6]
+
+    def push(self, frm: int, to: int):
+        code = self.mailbox[frm]
+        color, ptype = divmod(code, 6)
+        captured = self.mailbox[to]
+        self.history.append((frm, to, code, captured, self.castling))
+
+        if captured != -1:
+            self.remove_piece(to)
+        self.remove_piece(frm)
+        if ptype == PAWN and to // 8 == PROMOTION_RANK[color]:
+            self.put_piece(to, color, QUEEN)
+        else:
+            self.put_piece(to, color, ptype)
+
+        if ptype == KING and abs(to - frm) == 2:
+            for _, king_from, king_to, rook_from, rook_to, _ in CASTLING:
+                if (king_from, king_to) == (frm, to):
+                    self.remove_piece(rook_from)
+                    self.put_piece(rook_to, color, ROOK)
+
+        self.set_castling(self.castling & CASTLING_MASK[frm] & CASTLING_MASK[to])
+        self.side ^= 1
+        self.hash ^= SIDE_KEY
+
+    def pop(self):
+        frm, to, code, captured, castling = self.history.pop()
+        color, ptype = divmod(code, 6)
+        self.side ^= 1
+        self.hash ^= SIDE_KEY
+        self.set_castling(castling)
+
+        if ptype == KING and abs(to - frm) == 2:
+            for _, king_from, king_to, rook_from, rook_to, _ in CASTLING:
+                if (king_from, king_to) == (frm, to):
+                    self.remove_piece(rook_to)
+                    self.put_piece(rook_from, color, ROOK)
+
+        self.remove_piece(to)
+        self.put_piece(frm, color, ptype)
+        if captured != -1:
+            self.put_piece(to, *divmod(captured, 6))
+
+    def make_move(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]):
+        """Plays a move known to be legal, it can be taken back with unmake_move."""
+        self.push(from_pos[1] * 8 + from_pos[0], to_pos[1] * 8 + to_pos[0])
+
+    def make_packed_move(self, move: int):
+        self.push(move & 63, move >> 6 & 63)
+
+    def unmake_move(self):
+        self.pop()
+
+    def make_null_move(self):
+        """Passes the turn without moving, used by null-move pruning."""
+        self.side ^= 1
+        self.hash ^= SIDE_KEY
+
+    def unmake_null_move(self):
+        self.make_null_move()
+
+    def has_non_pawn_material(self, color: Literal['white', 'black']) -> bool:
+        pieces = self.pieces[COLOR_INDEX[color]]
+        return bool(pieces[KNIGHT] | pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN])
+
+    def handle_move(self, from_pos: Tuple[int, int],
+                    to_pos: Tuple[int, int]) -> bool:
+        frm = from_pos[1] * 8 + from_pos[0]
+        to = to_pos[1] * 8 + to_pos[0]
+        code = self.mailbox[frm]
+        if code == -1 or code // 6 != self.side:
+            return False
+        if (frm, to) in self.legal_moves(self.side):
+            self.push(frm, to)
+            return True
+        return False
+
+    def get_piece_from_pos(
+            self, pos: Tuple[int, int]) -> Tuple[Literal['white', 'black'], str]:
+        """Returns (color, notation) of the piece on pos, None if empty."""
+        code = self.mailbox[pos[1] * 8 + pos[0]]
+        if code == -1:
+            return None
+        return COLORS[code // 6], NOTATIONS[code % 6]
@@ -3,6 +3,8 @@
 import pygame
 
 from typing import Literal
+from data.classes.Geometry import PAWN_CAPTURES
+from data.classes.MoveGenerator import generate_legal_moves
 from data.classes.Square import Square
 from data.classes.Piece import Piece
 from data.classes.pieces.Rook import Rook
@@ -19,6 +21,8 @@ class Board:
     def __init__(self, display: pygame.surface.Surface, width: float,
                  height: float):
         self.display = display
+        # without a display nothing is drawn, no sprites or rects are built
+        self.headless = display is None
         self.width = width
         self.height = height
         self.tile_width = width // 8
@@ -37,6 +41,7 @@ class Board:
         ]
         self.squares: list[Square] = self.generate_squares()
         self.setup_board()
+        self.build_attack_maps()
 
     def generate_squares(self) -> list[Square]:
         output: list[Square] = []
@@ -46,9 +51,10 @@ class Board:
         return output
 
     def get_square_from_pos(self, pos: tuple[float, float]) -> Square:
-        for square in self.squares:
-            if (square.x, square.y) == (pos[0], pos[1]):
-                return square
+        # squares are stored row by row, so (x, y) lives at index y * 8 + x
+        x, y = pos
+        if 0 <= x < 8 and 0 <= y < 8:
+            return self.squares[int(y) * 8 + int(x)]
 
     def get_piece_from_pos(self, pos: tuple[float, float]) -> Piece:
         return self.get_square_from_pos(pos).occupying_piece
@@ -98,60 +104,99 @@ class Board:
 
         return False
 
-    # check state checker
-    def is_in_check(
-            self,
-            color: Literal['white', 'black'],
-            board_change: tuple[tuple[int, int], tuple[int,
-                                                       int]] = None) -> bool:
-        # board_change = [(x1, y1), (x2, y2)]
-        output = False
-        king_pos: tuple[int, int] = None
-        changing_piece: Piece = None
-        old_square: Square = None
-        new_square: Square = None
-        new_square_old_piece: Piece = None
-        if board_change is not None:
-            for square in self.squares:
-                if square.pos == board_change[0]:
-                    changing_piece = square.occupying_piece
-                    old_square = square
-                    old_square.occupying_piece = None
-            for square in self.squares:
-                if square.pos == board_change[1]:
-                    new_square = square
-                    new_square_old_piece = new_square.occupying_piece
-                    new_square.occupying_piece = changing_piece
-        pieces = [
-            i.occupying_piece for i in self.squares
-            if i.occupying_piece is not None
-        ]
-        if changing_piece is not None:
-            if changing_piece.notation == 'K':
-                king_pos = new_square.pos
-        if king_pos == None:
-            for piece in pieces:
-                if piece.notation == 'K' and piece.color == color:
-                    king_pos = piece.pos
-        for piece in pieces:
-            if piece.color != color:
-                for square in piece.attacking_squares(self):
-                    if square.pos == king_pos:
-                        output = True
-        if board_change is not None:
-            old_square.occupying_piece = changing_piece
-            new_square.occupying_piece = new_square_old_piece
+    # attack maps
+    def covered_squares(self, piece: Piece) -> list[Square]:
+        # squares the piece attacks, up to and including the first blocker
+        index = piece.y * 8 + piece.x
+        if piece.notation == 'P':
+            return [self.squares[i] for i in PAWN_CAPTURES[piece.color][index]]
+        output = []
+        for ray in piece.rays[index]:
+            for i in ray:
+                square = self.squares[i]
+                output.append(square)
+                if square.occupying_piece is not None:
+                    break
+        output.extend(self.squares[i] for i in piece.jumps[index])
         return output
 
+    def build_attack_maps(self) -> None:
+        # attack_maps[color][y * 8 + x] holds the pieces of color attacking (x, y)
+        self.attack_maps: dict[str, list[set[Piece]]] = {
+            'white': [set() for _ in range(64)],
+            'black': [set() for _ in range(64)],
+        }
+        self.piece_attacks: dict[Piece, list[int]] = {}
+        self.kings: dict[str, Piece] = {}
+        self.legal_move_cache: dict[str, dict] = {}
+        for square in self.squares:
+            piece = square.occupying_piece
+            if piece is not None:
+                if piece.notation == 'K':
+                    self.kings[piece.color] = piece
+                self.add_attacks(piece)
+
+    def add_attacks(self, piece: Piece) -> None:
+        attacked = [s.y * 8 + s.x for s in self.covered_squares(piece)]
+        attack_map = self.attack_maps[piece.color]
+        for index in attacked:
+            attack_map[index].add(piece)
+        self.piece_attacks[piece] = attacked
+
+    def remove_attacks(self, piece: Piece) -> None:
+        attack_map = self.attack_maps[piece.color]
+        for index in self.piece_attacks.pop(piece, []):
+            attack_map[index].discard(piece)
+
+    def update_attack_maps(self, changed: list[tuple[int, int]],
+                           removed: list[Piece] = ()) -> None:
+        # Only pieces on the changed squares, removed pieces and pieces
+        # whose attacks reach a changed square can attack differently now
+        self.legal_move_cache = {}
+        affected = set(removed)
+        for pos in changed:
+            index = pos[1] * 8 + pos[0]
+            affected.update(self.attack_maps['white'][index])
+            affected.update(self.attack_maps['black'][index])
+            if self.squares[index].occupying_piece is not None:
+                affected.add(self.squares[index].occupying_piece)
+        for piece in affected:
+            self.remove_attacks(piece)
+            if self.get_piece_from_pos(piece.pos) is piece:
+                self.add_attacks(piece)
+                if piece.notation == 'K':
+                    self.kings[piece.color] = piece
+
+    def is_square_attacked(self, pos: tuple[int, int],
+                           color: Literal['white', 'black']) -> bool:
+        # True if a piece of color attacks pos
+        return len(self.attack_maps[color][pos[1] * 8 + pos[0]]) > 0
+
+    # check state checker, answered from the attack maps
+    def is_in_check(self, color: Literal['white', 'black']) -> bool:
+        enemy = 'black' if color == 'white' else 'white'
+        if color not in self.kings:
+            return False
+        return self.is_square_attacked(self.kings[color].pos, enemy)
+
+    # legal moves of color by starting position, generated once per position
+    def legal_moves(
+            self,
+            color: Literal['white', 'black']) -> dict[tuple[int, int],
+                                                      list[Square]]:
+        if color not in self.legal_move_cache:
+            moves: dict[tuple[int, int], list[Square]] = {}
+            for from_pos, to_pos in generate_legal_moves(self, color):
+                moves.setdefault(from_pos, []).append(
+                    self.get_square_from_pos(to_pos))
+            self.legal_move_cache[color] = moves
+        return self.legal_move_cache[color]
+
     # checkmate state checker
     def is_in_checkmate(self, color: Literal['white', 'black']):
         if not self.is_in_check(color):
             return False
-        for piece in [i.occupying_piece for i in self.squares]:
-            if piece != None and piece.color == color \
-                and len(piece.get_valid_moves(self)) > 0:
-                return False
-        return True
+        return len(self.legal_moves(color)) == 0
 
     def draw(self, display: pygame.surface.Surface = None):
         if display == None:
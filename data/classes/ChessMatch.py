@@ -8,12 +8,17 @@ color_code = {"black": "b", "white": "w"}
 point_map = {" ": 0, "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": "20"}
 
 
-def chess_match(white_player: ChessAgent, black_player: ChessAgent):
+def chess_match(white_player: ChessAgent,
+                black_player: ChessAgent,
+                headless: bool = False):
+    # headless: no window, no drawing and no pause at the end, for batch runs
     assert (white_player.color == 'white')
     assert (black_player.color == 'black')
-    pygame.init()
     WINDOW_SIZE = (600, 600)
-    screen = pygame.display.set_mode(WINDOW_SIZE)
+    screen = None
+    if not headless:
+        pygame.init()
+        screen = pygame.display.set_mode(WINDOW_SIZE)
     board = Board(screen, WINDOW_SIZE[0], WINDOW_SIZE[1])
     agents: list[ChessAgent] = [white_player, black_player]
     i: int = 0
@@ -32,6 +37,9 @@ def chess_match(white_player: ChessAgent, black_player: ChessAgent):
 
     white_player_time_log = []
     black_player_time_log = []
+    # per move search statistics, for agents that record them
+    white_player_stats_log = []
+    black_player_stats_log = []
 
     while running:
         print(f"Current Turn: {board.turn}")  # Debug: Show current turn
@@ -43,10 +51,15 @@ def chess_match(white_player: ChessAgent, black_player: ChessAgent):
         time_delta = time_end - time_start
         print("time_elapsed: ", time_delta)
 
+        search_stats = agents[i].search_stats()
         if board.turn == 'white':
             white_player_time_log.append(time_delta)
+            if search_stats is not None:
+                white_player_stats_log.append(search_stats)
         else:
             black_player_time_log.append(time_delta)
+            if search_stats is not None:
+                black_player_stats_log.append(search_stats)
 
         if chosen_action is False:
             print('Players draw!')
@@ -106,10 +119,12 @@ def chess_match(white_player: ChessAgent, black_player: ChessAgent):
 
                 print("Invalid move!")  # Notify about invalid moves
                 break
-        board.draw()
+        if not headless:
+            board.draw()
 
-    pygame.time.wait(3000)
-    pygame.quit()
+    if not headless:
+        pygame.time.wait(3000)
+        pygame.quit()
 
     outcome = {
         "winner": winner,
@@ -122,7 +137,9 @@ def chess_match(white_player: ChessAgent, black_player: ChessAgent):
         "p2_move_count": p2_move_count,
         "game_end_status": game_end_status,
         "p1_time_log": white_player_time_log,
-        "p2_time_log": black_player_time_log
+        "p2_time_log": black_player_time_log,
+        "p1_search_stats": white_player_stats_log,
+        "p2_search_stats": black_player_stats_log
         # TODO: We can add move sequence to the outcome for both players
     }
     return outcome
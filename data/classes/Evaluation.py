@@ -0,0 +1,127 @@
+"""
+    Evaluation.py
+    ------------------------------------------
+    Material and piece-square-table evaluation usable by any agent.
+
+    Values are in centipawns. Tables are written from White's
+    side with row 0 being y = 0 on the Game Board (Black's back
+    rank); Black reads them mirrored. SimulationBoard and
+    BitboardBoard keep `scores` (White's total, Black's total)
+    updated on every move, so evaluating them is a single
+    subtraction. Any other board is scanned square by square.
+"""
+
+from typing import Literal, List
+
+WHITE, BLACK = 0, 1
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+NOTATIONS = ['P', 'N', 'B', 'R', 'Q', 'K']
+
+PIECE_VALUES = {'P': 100, 'N': 300, 'B': 300, 'R': 500, 'Q': 900, 'K': 0}
+
+PIECE_SQUARE_TABLES = {
+    'P': [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    'N': [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    'B': [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    'R': [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    'Q': [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    'K': [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+
+def _square_values(color: int, notation: str) -> List[int]:
+    table = PIECE_SQUARE_TABLES[notation]
+    value = PIECE_VALUES[notation]
+    if color == WHITE:
+        return [value + table[index] for index in range(64)]
+    # mirror the rows for black
+    return [value + table[(7 - index // 8) * 8 + index % 8]
+            for index in range(64)]
+
+
+# SQUARE_VALUES[color * 6 + piece][y * 8 + x], pieces in NOTATIONS order
+SQUARE_VALUES: List[List[int]] = [_square_values(color, notation)
+                                  for color in (WHITE, BLACK)
+                                  for notation in NOTATIONS]
+
+
+def square_values(color: Literal['white', 'black'], notation: str) -> List[int]:
+    """Material plus table value of a piece for every square index y * 8 + x."""
+    return SQUARE_VALUES[COLOR_INDEX[color] * 6 + NOTATIONS.index(notation)]
+
+
+def compute_scores(board) -> List[int]:
+    """[White's score, Black's score] by scanning the squares of a board."""
+    scores = [0, 0]
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is not None:
+            scores[COLOR_INDEX[piece.color]] += \
+                square_values(piece.color, piece.notation)[square.y * 8 + square.x]
+    return scores
+
+
+def evaluate(board, color: Literal['white', 'black']) -> int:
+    """
+        Score of the position for color, positive when color is
+        ahead. Uses the running `scores` of the search boards
+        and falls back to a full scan for the Game Board.
+    """
+    scores = board.scores if hasattr(board, 'scores') else compute_scores(board)
+    if color == 'white':
+        return scores[WHITE] - scores[BLACK]
+    return scores[BLACK] - scores[WHITE]
@@ -0,0 +1,88 @@
+"""
+    Geometry.py
+    ------------------------------------------
+    Precomputed move geometry of every square, shared by the
+    Game Board pieces and the simulation pieces.
+
+    Squares are indices y * 8 + x, the order of `board.squares`
+    on every board. RAYS[sq][d] holds the squares from sq
+    towards the board edge in direction DIRECTIONS[d], nearest
+    first. The per-piece tables give, for each square, the
+    rays or jump targets of the piece in its move order, so a
+    piece walks board.squares without bounds checks. All
+    tables are tuples built once at import, and the rays are
+    the same tuple objects in every table.
+
+    The Game Board and simulation pieces walk these tables
+    directly; the legal move generator, the bitboards (as
+    masks) and the tablebase generator (as numpy arrays) are
+    built from them as well.
+"""
+
+from typing import List, Tuple
+
+Table = Tuple[Tuple, ...]
+
+# north, ne, east, se, south, sw, west, nw (y = 0 is Black's back rank)
+DIRECTIONS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0),
+              (-1, -1))
+ROOK_DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+BISHOP_DIRECTIONS = ((1, -1), (1, 1), (-1, 1), (-1, -1))
+SLIDER_DIRECTIONS = {
+    'R': ROOK_DIRECTIONS,
+    'B': BISHOP_DIRECTIONS,
+    'Q': DIRECTIONS,
+}
+KNIGHT_OFFSETS = ((1, -2), (2, -1), (2, 1), (1, 2), (-1, 2), (-2, 1),
+                  (-2, -1), (-1, -2))
+KING_OFFSETS = DIRECTIONS
+# White pawns capture towards y = 0, black pawns towards y = 7
+PAWN_OFFSETS = {
+    'white': ((-1, -1), (1, -1)),
+    'black': ((-1, 1), (1, 1)),
+}
+
+
+def _ray(sq: int, dx: int, dy: int) -> Tuple[int, ...]:
+    output = []
+    x, y = sq % 8 + dx, sq // 8 + dy
+    while 0 <= x < 8 and 0 <= y < 8:
+        output.append(y * 8 + x)
+        x, y = x + dx, y + dy
+    return tuple(output)
+
+
+RAYS: Table = tuple(tuple(_ray(sq, dx, dy) for dx, dy in DIRECTIONS)
+                    for sq in range(64))
+
+
+def ray_table(directions: List[Tuple[int, int]]) -> Table:
+    """Per square, the rays along directions in the given order."""
+    indices = [DIRECTIONS.index(direction) for direction in directions]
+    return tuple(tuple(RAYS[sq][d] for d in indices) for sq in range(64))
+
+
+def step_table(offsets: List[Tuple[int, int]]) -> Table:
+    """Per square, the square one offset away for every offset, -1 off the board."""
+    return tuple(tuple((sq // 8 + dy) * 8 + sq % 8 + dx
+                       if 0 <= sq % 8 + dx < 8 and 0 <= sq // 8 + dy < 8 else -1
+                       for dx, dy in offsets)
+                 for sq in range(64))
+
+
+def jump_table(offsets: List[Tuple[int, int]]) -> Table:
+    """Per square, the squares one offset away that are on the board."""
+    return tuple(tuple(target for target in steps if target >= 0)
+                 for steps in step_table(offsets))
+
+
+ROOK_RAYS = ray_table(ROOK_DIRECTIONS)
+BISHOP_RAYS = ray_table(BISHOP_DIRECTIONS)
+QUEEN_RAYS = ray_table(DIRECTIONS)
+SLIDER_RAYS = {'R': ROOK_RAYS, 'B': BISHOP_RAYS, 'Q': QUEEN_RAYS}
+KNIGHT_JUMPS = jump_table(KNIGHT_OFFSETS)
+KING_JUMPS = jump_table(KING_OFFSETS)
+# Squares a pawn of the color captures on
+PAWN_CAPTURES = {color: jump_table(offsets) for color, offsets in PAWN_OFFSETS.items()}
+# No rays or jumps from any square
+EMPTY: Table = ((),) * 64
@@ -0,0 +1,30 @@
+"""
+    Move.py
+    ------------------------------------------
+    Packed integer moves used by the search.
+
+    A move is from | to << 6 | flags << 12, the squares being
+    indices y * 8 + x. The only flag is CAPTURE. Which piece
+    moves or is captured is not stored: it is looked up on the
+    board when a move is ordered or reported, so generating a
+    move allocates nothing but the integer.
+"""
+
+from typing import Tuple
+
+Position = Tuple[int, int]
+
+CAPTURE = 1 << 12
+# from | to, without the flags
+SQUARES = (1 << 12) - 1
+
+SQUARE_POS = [(sq % 8, sq // 8) for sq in range(64)]
+
+
+def encode_move(from_pos: Position, to_pos: Position, capture: bool = False) -> int:
+    move = (from_pos[1] * 8 + from_pos[0]) | (to_pos[1] * 8 + to_pos[0]) << 6
+    return move | CAPTURE if capture else move
+
+
+def decode_move(move: int) -> Tuple[Position, Position]:
+    return SQUARE_POS[move & 63], SQUARE_POS[move >> 6 & 63]
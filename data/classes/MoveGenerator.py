@@ -0,0 +1,240 @@
+"""
+    MoveGenerator.py
+    ------------------------------------------
+    Legal move generation shared by the Game Board and
+    SimulationBoard.
+
+    Pieces only know their pseudo-legal moves (`get_moves`).
+    For every position the generator works out, once, the
+    squares attacked by the opponent with the King lifted off
+    the board, the pieces giving check, the squares a check
+    can be blocked or captured on and the pinned pieces with
+    the line they may still move along. The pseudo-legal
+    moves are then filtered in a single pass. In double check
+    only the King moves. Castling is added here as well: the
+    King and Rook must be unmoved, the squares between them
+    empty, and the King may not castle out of, through or
+    into check.
+
+    The Game Board keeps attack maps up to date as pieces
+    move, so its attacked squares and checkers are read from
+    them; SimulationBoard has none and scans the opponent's
+    pieces.
+"""
+
+from typing import Literal, List, Tuple
+from data.classes.Geometry import DIRECTIONS, RAYS, SLIDER_DIRECTIONS, \
+    SLIDER_RAYS, KNIGHT_JUMPS, KING_JUMPS, PAWN_CAPTURES
+from data.classes.Move import SQUARE_POS
+
+Position = Tuple[int, int]
+
+# (rook x, king target x, squares that must be empty, squares the King crosses)
+CASTLING_SIDES = [
+    (7, 6, (5, 6), (5, 6)),
+    (0, 2, (1, 2, 3), (3, 2)),
+]
+
+
+def opponent(color: Literal['white', 'black']) -> Literal['white', 'black']:
+    return 'black' if color == 'white' else 'white'
+
+
+def attacked_by(piece, board, ignore: Position = None) -> List[Position]:
+    """
+        Squares piece attacks, up to and including the first
+        blocker. The square `ignore` is treated as empty, which
+        lets rays run through the King being moved.
+    """
+    index = piece.pos[1] * 8 + piece.pos[0]
+    notation = piece.notation
+    if notation == 'P':
+        return [SQUARE_POS[target] for target in PAWN_CAPTURES[piece.color][index]]
+    if notation == 'N' or notation == 'K':
+        jumps = KNIGHT_JUMPS if notation == 'N' else KING_JUMPS
+        return [SQUARE_POS[target] for target in jumps[index]]
+    ignored = -1 if ignore is None else ignore[1] * 8 + ignore[0]
+    squares = board.squares
+    output = []
+    for ray in SLIDER_RAYS[notation][index]:
+        for target in ray:
+            output.append(SQUARE_POS[target])
+            if target != ignored and squares[target].occupying_piece is not None:
+                break
+    return output
+
+
+def find_king(board, color: Literal['white', 'black']):
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is not None and piece.notation == 'K' \
+                and piece.color == color:
+            return piece
+    return None
+
+
+def is_square_attacked(board, pos: Position,
+                       color: Literal['white', 'black']) -> bool:
+    """True if a piece of color attacks pos."""
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is not None and piece.color == color \
+                and pos in attacked_by(piece, board):
+            return True
+    return False
+
+
+def is_in_check(board, color: Literal['white', 'black']) -> bool:
+    king = find_king(board, color)
+    return king is not None and \
+        is_square_attacked(board, king.pos, opponent(color))
+
+
+def find_pins(board, king) -> dict:
+    """Maps each pinned piece's position to the squares it may still move to."""
+    pins = {}
+    squares = board.squares
+    rays = RAYS[king.pos[1] * 8 + king.pos[0]]
+    for direction, ray in zip(DIRECTIONS, rays):
+        line = []
+        pinned = None
+        for target in ray:
+            line.append(SQUARE_POS[target])
+            piece = squares[target].occupying_piece
+            if piece is not None:
+                if piece.color == king.color:
+                    if pinned is not None:
+                        break
+                    pinned = piece
+                else:
+                    if pinned is not None and piece.notation in SLIDER_DIRECTIONS \
+                            and direction in SLIDER_DIRECTIONS[piece.notation]:
+                        pins[pinned.pos] = set(line)
+                    break
+    return pins
+
+
+def line_between(start: Position, end: Position) -> List[Position]:
+    """Squares strictly between two squares on one rank, file or diagonal."""
+    dx = (end[0] > start[0]) - (end[0] < start[0])
+    dy = (end[1] > start[1]) - (end[1] < start[1])
+    output = []
+    x, y = start[0] + dx, start[1] + dy
+    while (x, y) != end:
+        output.append((x, y))
+        x, y = x + dx, y + dy
+    return output
+
+
+def castling_moves(board, king, attacked: set) -> List[Position]:
+    output = []
+    if king.has_moved:
+        return output
+    kx, ky = king.pos
+    for rook_x, target_x, empty, crossed in CASTLING_SIDES:
+        rook = board.get_piece_from_pos((rook_x, ky))
+        if rook is None or rook.notation != 'R' or rook.color != king.color \
+                or rook.has_moved:
+            continue
+        if any(board.get_piece_from_pos((x, ky)) is not None for x in empty):
+            continue
+        if any((x, ky) in attacked for x in crossed):
+            continue
+        output.append((target_x, ky))
+    return output
+
+
+def scan_attacks(board, king, enemy_pieces: list) -> Tuple[set, list]:
+    # Opponent attacks with the King lifted off, and the checking pieces
+    attacked = set()
+    checkers = []
+    for piece in enemy_pieces:
+        for pos in attacked_by(piece, board, ignore=king.pos):
+            attacked.add(pos)
+            if pos == king.pos:
+                checkers.append(piece)
+    return attacked, checkers
+
+
+def map_attacks(board, king) -> Tuple[set, list]:
+    """
+        Same as scan_attacks, read from the attack maps the Game
+        Board keeps up to date. The maps see the King as a
+        blocker, so the square behind it on the line of a
+        checking slider is added.
+    """
+    attack_map = board.attack_maps[opponent(king.color)]
+    attacked = {SQUARE_POS[index] for index in range(64) if attack_map[index]}
+    kx, ky = king.pos
+    checkers = list(attack_map[ky * 8 + kx])
+    for checker in checkers:
+        if checker.notation in SLIDER_DIRECTIONS:
+            direction = ((kx > checker.pos[0]) - (kx < checker.pos[0]),
+                         (ky > checker.pos[1]) - (ky < checker.pos[1]))
+            ray = RAYS[ky * 8 + kx][DIRECTIONS.index(direction)]
+            if ray:
+                attacked.add(SQUARE_POS[ray[0]])
+    return attacked, checkers
+
+
+def generate_legal_moves(
+        board, color: Literal['white', 'black']) -> List[Tuple[Position, Position]]:
+    """All legal moves of color as (from position, to position) pairs."""
+    return legal_moves_and_checkers(board, color)[0]
+
+
+def legal_moves_and_checkers(
+        board, color: Literal['white', 'black']) -> Tuple[List[Tuple[Position, Position]], int]:
+    """
+        The legal moves of color and the number of pieces giving
+        check to its King, which the generator finds on the way.
+    """
+    own_pieces = []
+    enemy_pieces = []
+    king = None
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is not None:
+            if piece.color == color:
+                own_pieces.append(piece)
+                if piece.notation == 'K':
+                    king = piece
+            else:
+                enemy_pieces.append(piece)
+
+    if king is None:
+        # No King to protect, every pseudo-legal move goes
+        return [(piece.pos, square.pos) for piece in own_pieces
+                for square in piece.get_moves(board)], 0
+
+    if getattr(board, 'attack_maps', None) is not None:
+        attacked, checkers = map_attacks(board, king)
+    else:
+        attacked, checkers = scan_attacks(board, king, enemy_pieces)
+
+    moves = [(king.pos, square.pos) for square in king.get_moves(board)
+             if square.pos not in attacked]
+    if len(checkers) > 1:
+        return moves, len(checkers)
+    if not checkers:
+        moves.extend((king.pos, pos)
+                     for pos in castling_moves(board, king, attacked))
+        check_mask = None
+    else:
+        checker = checkers[0]
+        check_mask = {checker.pos}
+        if checker.notation in SLIDER_DIRECTIONS:
+            check_mask.update(line_between(king.pos, checker.pos))
+
+    pins = find_pins(board, king)
+    for piece in own_pieces:
+        if piece is king:
+            continue
+        pin_line = pins.get(piece.pos)
+        for square in piece.get_moves(board):
+            if check_mask is not None and square.pos not in check_mask:
+                continue
+            if pin_line is not None and square.pos not in pin_line:
+                continue
+            moves.append((piece.pos, square.pos))
+    return moves, len(checkers)
@@ -0,0 +1,131 @@
+"""
+    OpeningBook.py
+    ------------------------------------------
+    Opening book built offline from move sequences and
+    memory-mapped by the agents.
+
+    The file is a header (b'CPBK', uint32 entry count) followed
+    by fixed size little-endian entries (uint64 Zobrist key,
+    uint16 move, uint16 weight) sorted by key. A move packs the
+    from and to square indices (y * 8 + x) as from | to << 6.
+    Lookups binary search the mapped file, nothing is parsed
+    when the book is opened.
+
+    Move sequences are written one game per line in coordinate
+    notation (e2e4 e7e5 g1f3 ...), `#` starts a comment. The
+    weight of a move is the number of lines playing it from
+    that position.
+
+    Rebuild the default book with:
+        python -m data.classes.OpeningBook
+"""
+
+import mmap
+import random
+import struct
+import sys
+from typing import Dict, List, Tuple
+from data.classes.Bitboard import BitboardBoard
+from data.classes.Move import encode_move, decode_move
+
+HEADER = struct.Struct('<4sI')
+ENTRY = struct.Struct('<QHH')
+MAGIC = b'CPBK'
+
+DEFAULT_LINES = 'data/books/openings.txt'
+DEFAULT_BOOK = 'data/books/book.bin'
+
+Position = Tuple[int, int]
+
+
+def parse_square(name: str) -> Position:
+    """'e2' -> (4, 6), rank 8 is y = 0 on the Game Board."""
+    return ('abcdefgh'.index(name[0]), 8 - int(name[1]))
+
+
+def read_lines(path: str) -> List[List[str]]:
+    sequences = []
+    with open(path, 'r') as fin:
+        for line in fin:
+            line = line.split('#')[0].strip()
+            if line:
+                sequences.append(line.split())
+    return sequences
+
+
+def build_book(sequences: List[List[str]], path: str) -> int:
+    """
+        Replays every sequence from the starting position and
+        writes the weighted (position, move) pairs to path.
+        A sequence stops at its first illegal move. Returns the
+        number of entries written.
+    """
+    weights: Dict[Tuple[int, int], int] = {}
+    for sequence in sequences:
+        board = BitboardBoard()
+        for ply, name in enumerate(sequence):
+            from_pos, to_pos = parse_square(name[:2]), parse_square(name[2:4])
+            key = board.hash
+            if not board.handle_move(from_pos, to_pos):
+                print(f"illegal move {name} at ply {ply + 1}: {' '.join(sequence)}")
+                break
+            entry = (key, encode_move(from_pos, to_pos))
+            weights[entry] = weights.get(entry, 0) + 1
+
+    entries = sorted(weights.items())
+    with open(path, 'wb') as fout:
+        fout.write(HEADER.pack(MAGIC, len(entries)))
+        for (key, move), weight in entries:
+            fout.write(ENTRY.pack(key, move, min(weight, 0xFFFF)))
+    return len(entries)
+
+
+class OpeningBook:
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as fin:
+            self.data = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self.data, 0)
+        assert (magic == MAGIC)
+
+    def key_at(self, index: int) -> int:
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)[0]
+
+    def probe(self, key: int) -> List[Tuple[Position, Position, int]]:
+        """All book moves of a position as (from, to, weight)."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        offset = HEADER.size + low * ENTRY.size
+        while low < self.size:
+            entry_key, move, weight = ENTRY.unpack_from(self.data, offset)
+            if entry_key != key:
+                break
+            moves.append(decode_move(move) + (weight,))
+            low += 1
+            offset += ENTRY.size
+        return moves
+
+    def choose(self, key: int) -> Tuple[Position, Position] | None:
+        """A book move picked at random in proportion to its weight."""
+        moves = self.probe(key)
+        if not moves:
+            return None
+        move = random.choices(moves, weights=[move[2] for move in moves])[0]
+        return move[0], move[1]
+
+    def close(self):
+        self.data.close()
+
+
+if __name__ == '__main__':
+    lines_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LINES
+    book_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BOOK
+    count = build_book(read_lines(lines_path), book_path)
+    print(f"{count} entries written to {book_path}")
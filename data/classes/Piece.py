@@ -3,6 +3,7 @@
 from __future__ import annotations
 import pygame
 
+from data.classes.Geometry import EMPTY
 from typing import Literal, TYPE_CHECKING
 if TYPE_CHECKING:
     from data.classes.Board import Board
@@ -10,6 +11,9 @@ if TYPE_CHECKING:
 
 
 class Piece:
+    # Per square rays and jump targets of the piece type, see Geometry.py
+    rays = EMPTY
+    jumps = EMPTY
 
     def __init__(self, pos: tuple[int, int], color: Literal['white', 'black'],
                  board: Board):
@@ -21,52 +25,59 @@ class Piece:
         self.has_moved: bool = False
         self.img: pygame.surface.Surface = None
 
-    def get_possible_moves(self) -> list[list[Square]]:
-        # Must be implemented by child classes
-        assert (False)
+    def get_possible_moves(self, board: Board) -> list[list[Square]]:
+        # squares along each ray, a jump being a ray of one square
+        squares = board.squares
+        index = self.y * 8 + self.x
+        output = [[squares[i] for i in ray] for ray in self.rays[index]]
+        output.extend([squares[i]] for i in self.jumps[index])
+        return output
 
     def get_moves(self, board: Board) -> list[Square]:
         output: list[Square] = []
-        for direction in self.get_possible_moves(board):
-            direction: list[Square]
-            for square in direction:
-                square: Square
+        squares = board.squares
+        index = self.y * 8 + self.x
+        for ray in self.rays[index]:
+            for i in ray:
+                square: Square = squares[i]
                 if square.occupying_piece is not None:
-                    if square.occupying_piece.color == self.color:
-                        break
-                    else:
+                    if square.occupying_piece.color != self.color:
                         output.append(square)
-                        break
-                else:
-                    output.append(square)
+                    break
+                output.append(square)
+        for i in self.jumps[index]:
+            square = squares[i]
+            if square.occupying_piece is None or \
+                    square.occupying_piece.color != self.color:
+                output.append(square)
         return output
 
     def get_valid_moves(self, board: Board) -> list[Square]:
-        output: list[Square] = []
-        for square in self.get_moves(board):
-            if not board.is_in_check(self.color,
-                                     board_change=[self.pos, square.pos]):
-                output.append(square)
-        return output
+        # pins, checks and castling are resolved for the whole board at once
+        return board.legal_moves(self.color).get(self.pos, [])
 
     def move(self, board: Board, square: Square, force: bool = False) -> bool:
         if (square is None):
             return False
         for i in board.squares:
             i.highlight = False
-        if square in self.get_valid_moves(board) or force:
+        if force or square in self.get_valid_moves(board):
             prev_square = board.get_square_from_pos(self.pos)
+            captured_piece = square.occupying_piece
+            removed = [captured_piece] if captured_piece is not None else []
             self.pos, self.x, self.y = square.pos, square.x, square.y
             prev_square.occupying_piece = None
             square.occupying_piece = self
             board.selected_square = None
             self.has_moved = True
             # Pawn promotion
-            if self.notation == ' ':
+            if self.notation == 'P':
                 if self.y == 0 or self.y == 7:
                     from data.classes.pieces.Queen import Queen
                     square.occupying_piece = Queen((self.x, self.y),
                                                    self.color, board)
+                    removed.append(self)
+            board.update_attack_maps([prev_square.pos, square.pos], removed)
             # Move rook if king castles
             if self.notation == 'K':
                 if prev_square.x - self.x == 2:
@@ -0,0 +1,218 @@
+"""
+    ResultStore.py
+    ------------------------------------------
+    SQLite database of simulation outcomes, filled from the
+    result files so the analysis scripts query it instead of
+    parsing every file on every run.
+
+    One row per match in `matches`, the per-move times in
+    `move_times` and the per-move search statistics of the
+    Minimax Agent in `search_stats`, as JSON objects (player 1
+    is white, ply counts that player's moves from 0). Matches are indexed by matchup, winner, end
+    status and move count. The matchup of a file is the name
+    of the directory it was ingested from.
+
+    Ingesting is incremental: `files` remembers how far every
+    file was read. JSON Lines files, which grow while a run is
+    going, are read on from that byte offset; legacy array
+    files are read again only when their size or modification
+    time changed.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from typing import Iterator, List
+from data.classes.Results import read_results, read_new_lines, is_result_file
+
+DEFAULT_DATABASE = 'data/results/results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    matchup TEXT NOT NULL,
+    seed INTEGER,
+    winner TEXT,
+    is_draw INTEGER NOT NULL,
+    game_end_status TEXT NOT NULL,
+    p1_points INTEGER NOT NULL,
+    p2_points INTEGER NOT NULL,
+    p1_capture_count INTEGER NOT NULL,
+    p2_capture_count INTEGER NOT NULL,
+    p1_move_count INTEGER NOT NULL,
+    p2_move_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS move_times (
+    match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    player INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (match_id, player, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_stats (
+    match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    player INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    stats TEXT NOT NULL,
+    PRIMARY KEY (match_id, player, ply)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS matches_matchup ON matches(matchup);
+CREATE INDEX IF NOT EXISTS matches_winner ON matches(winner);
+CREATE INDEX IF NOT EXISTS matches_status ON matches(game_end_status);
+CREATE INDEX IF NOT EXISTS matches_moves ON matches(p1_move_count);
+CREATE INDEX IF NOT EXISTS matches_file ON matches(file);
+"""
+
+# Outcome keys stored as columns of `matches`, in column order
+MATCH_COLUMNS = ["seed", "winner", "is_draw", "game_end_status",
+                 "p1_points", "p2_points", "p1_capture_count",
+                 "p2_capture_count", "p1_move_count", "p2_move_count"]
+
+
+class ResultStore:
+
+    def __init__(self, path: str = DEFAULT_DATABASE):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def ingest(self, directory: str, matchup: str = None) -> int:
+        """
+            Loads the matches added to the result files of
+            directory since the last call. Returns the number of
+            matches added.
+        """
+        if matchup is None:
+            matchup = os.path.basename(os.path.normpath(directory))
+        added = 0
+        for filename in sorted(os.listdir(directory)):
+            filepath = os.path.join(directory, filename)
+            if os.path.isfile(filepath) and is_result_file(filename):
+                added += self.ingest_file(filepath, matchup)
+        return added
+
+    def ingest_file(self, filepath: str, matchup: str) -> int:
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT size, mtime, offset FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return 0
+
+        appendable = path.endswith('.jsonl') and row is not None \
+            and row["offset"] <= stat.st_size
+        added = 0
+        with self.connection:
+            if appendable:
+                offset = row["offset"]
+                for outcome, offset in read_new_lines(path, offset):
+                    self.insert(path, matchup, outcome)
+                    added += 1
+            else:
+                # new or rewritten file, its old rows are replaced
+                self.connection.execute("DELETE FROM matches WHERE file = ?", (path,))
+                if path.endswith('.jsonl'):
+                    offset = 0
+                    for outcome, offset in read_new_lines(path, 0):
+                        self.insert(path, matchup, outcome)
+                        added += 1
+                else:
+                    offset = stat.st_size
+                    for outcome in read_results(path):
+                        self.insert(path, matchup, outcome)
+                        added += 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, offset) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime, offset))
+        return added
+
+    def insert(self, path: str, matchup: str, outcome: dict):
+        cursor = self.connection.execute(
+            f"INSERT INTO matches (file, matchup, {', '.join(MATCH_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(MATCH_COLUMNS) + 2))})",
+            [path, matchup] + [outcome.get(column) for column in MATCH_COLUMNS])
+        match_id = cursor.lastrowid
+        for player, key in ((1, "p1_time_log"), (2, "p2_time_log")):
+            self.connection.executemany(
+                "INSERT INTO move_times (match_id, player, ply, seconds) VALUES (?, ?, ?, ?)",
+                [(match_id, player, ply, seconds)
+                 for ply, seconds in enumerate(outcome.get(key) or [])])
+        for player, key in ((1, "p1_search_stats"), (2, "p2_search_stats")):
+            self.connection.executemany(
+                "INSERT INTO search_stats (match_id, player, ply, stats) VALUES (?, ?, ?, ?)",
+                [(match_id, player, ply, json.dumps(stats))
+                 for ply, stats in enumerate(outcome.get(key) or [])])
+
+    def where(self, matchup: str = None, winner: str = None,
+              game_end_status: str = None, min_moves: int = None):
+        # WHERE clause and parameters of the match filters that are set
+        conditions, parameters = [], []
+        for column, value in (("matchup", matchup), ("winner", winner),
+                              ("game_end_status", game_end_status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if min_moves is not None:
+            conditions.append("p1_move_count >= ?")
+            parameters.append(min_moves)
+        clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return clause, parameters
+
+    def time_log(self, match_id: int, player: int) -> List[float]:
+        return [row[0] for row in self.connection.execute(
+            "SELECT seconds FROM move_times WHERE match_id = ? AND player = ? ORDER BY ply",
+            (match_id, player))]
+
+    def stats_log(self, match_id: int, player: int) -> List[dict]:
+        return [json.loads(row[0]) for row in self.connection.execute(
+            "SELECT stats FROM search_stats WHERE match_id = ? AND player = ? ORDER BY ply",
+            (match_id, player))]
+
+    def to_outcome(self, row: sqlite3.Row, time_logs: bool, search_stats: bool) -> dict:
+        outcome = {column: row[column] for column in MATCH_COLUMNS}
+        outcome["is_draw"] = bool(outcome["is_draw"])
+        outcome["matchup"] = row["matchup"]
+        if time_logs:
+            outcome["p1_time_log"] = self.time_log(row["id"], 1)
+            outcome["p2_time_log"] = self.time_log(row["id"], 2)
+        if search_stats:
+            outcome["p1_search_stats"] = self.stats_log(row["id"], 1)
+            outcome["p2_search_stats"] = self.stats_log(row["id"], 2)
+        return outcome
+
+    def matches(self, matchup: str = None, winner: str = None,
+                game_end_status: str = None, min_moves: int = None,
+                time_logs: bool = True, search_stats: bool = True) -> Iterator[dict]:
+        """Outcomes matching every filter that is set, in ingest order."""
+        clause, parameters = self.where(matchup, winner, game_end_status, min_moves)
+        for row in self.connection.execute(
+                f"SELECT * FROM matches{clause} ORDER BY id", parameters):
+            yield self.to_outcome(row, time_logs, search_stats)
+
+    def sample(self, count: int, matchup: str = None, winner: str = None,
+               game_end_status: str = None, min_moves: int = None,
+               time_logs: bool = True, search_stats: bool = True) -> List[dict]:
+        """Up to count outcomes picked at random among the matching ones."""
+        clause, parameters = self.where(matchup, winner, game_end_status, min_moves)
+        rows = self.connection.execute(
+            f"SELECT * FROM matches{clause} ORDER BY RANDOM() LIMIT ?",
+            parameters + [count]).fetchall()
+        return [self.to_outcome(row, time_logs, search_stats) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    store = ResultStore(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DATABASE)
+    print(f"{store.ingest(sys.argv[1])} matches added")
+    store.close()
@@ -0,0 +1,130 @@
+"""
+    Results.py
+    ------------------------------------------
+    Reading and writing simulation outcome files.
+
+    Runs are written as JSON Lines, one outcome per line,
+    appended as soon as a match finishes. A run that crashes
+    keeps every match flushed before the crash, and nothing
+    is held in memory. A line cut off by a crash has no
+    newline at the end and is skipped when reading.
+
+    Older runs are a single JSON array per file. Both formats
+    are read lazily, one outcome at a time.
+"""
+
+import json
+import os
+from typing import Iterator, Tuple
+
+# Characters read at a time from legacy array files
+CHUNK_SIZE = 1 << 16
+
+
+class ResultWriter:
+    """
+        Appends outcomes to a JSON Lines file, flushed to disk
+        every `batch_size` outcomes and when closed.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10):
+        assert (batch_size > 0)
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = 0
+        self.fout = open(path, 'a')
+
+    def write(self, outcome: dict):
+        self.fout.write(json.dumps(outcome) + '\n')
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.fout.flush()
+        os.fsync(self.fout.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.fout.closed:
+            self.flush()
+            self.fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_lines(fin) -> Iterator[dict]:
+    for line in fin:
+        # a line without its newline was cut off while being written
+        if line.endswith('\n') and line.strip():
+            yield json.loads(line)
+
+
+def _read_array(fin) -> Iterator[dict]:
+    # Decodes the array elements one by one from a growing buffer
+    decoder = json.JSONDecoder()
+    buffer = fin.read(CHUNK_SIZE)
+    pos = buffer.index('[') + 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            outcome, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = fin.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield outcome
+        pos = end
+
+
+def read_results(path: str) -> Iterator[dict]:
+    """Outcomes of a JSON Lines or legacy JSON array file, one at a time."""
+    with open(path, 'r') as fin:
+        first = ''
+        while first in ('', ' ', '\t', '\r', '\n'):
+            first = fin.read(1)
+            if first == '':
+                return
+        fin.seek(0)
+        if first == '[':
+            yield from _read_array(fin)
+        else:
+            yield from _read_lines(fin)
+
+
+def read_new_lines(path: str, offset: int) -> Iterator[Tuple[dict, int]]:
+    """
+        Outcomes of a JSON Lines file written after byte offset,
+        each with the offset just past its line, so a reader can
+        pick up where it stopped while the file keeps growing.
+    """
+    with open(path, 'rb') as fin:
+        fin.seek(offset)
+        for line in fin:
+            if not line.endswith(b'\n'):
+                return
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line), offset
+
+
+def is_result_file(filename: str) -> bool:
+    return filename.endswith(('.json', '.jsonl'))
+
+
+def read_directory(directory: str) -> Iterator[dict]:
+    """Outcomes of every result file in directory, in file name order."""
+    for filename in sorted(os.listdir(directory)):
+        filepath = os.path.join(directory, filename)
+        if os.path.isfile(filepath) and is_result_file(filename):
+            yield from read_results(filepath)
@@ -3,13 +3,42 @@
     ------------------------------------------
     Contains logic for copying board for Simulation
     and translating it back to Game Board.
+
+    Searches play moves on one SimulationBoard with
+    make_move and take them back with unmake_move, which
+    pops the undo record pushed by make_move.
 """
 
 from typing import Literal, List, Tuple
 from data.classes.Board import Board
+from data.classes.Evaluation import square_values, compute_scores
+from data.classes.Geometry import Table, ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS, \
+    KNIGHT_JUMPS, KING_JUMPS, PAWN_CAPTURES, EMPTY
+from data.classes.MoveGenerator import generate_legal_moves, legal_moves_and_checkers, \
+    is_in_check
+from data.classes.Move import encode_move, SQUARE_POS
+from data.classes.Zobrist import piece_keys, SIDE_KEY, CASTLING_KEYS, \
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+
+# Zobrist keys per (color, notation), indexed by y * 8 + x
+zobrist_keys = {(color, notation): piece_keys(color, notation)
+                for color in ('white', 'black') for notation in 'PNBRQK'}
+
+# Material plus piece-square value per (color, notation), indexed by y * 8 + x
+piece_values = {(color, notation): square_values(color, notation)
+                for color in ('white', 'black') for notation in 'PNBRQK'}
+
+# (castling right, king position, rook position, color)
+castling_squares = [
+    (WHITE_KINGSIDE, (4, 7), (7, 7), 'white'),
+    (WHITE_QUEENSIDE, (4, 7), (0, 7), 'white'),
+    (BLACK_KINGSIDE, (4, 0), (7, 0), 'black'),
+    (BLACK_QUEENSIDE, (4, 0), (0, 0), 'black'),
+]
 
 
 class SimulationSquare:
+    __slots__ = ('x', 'y', 'pos', 'occupying_piece')
 
     def __init__(self, x: int, y: int):
         self.x = x
@@ -18,7 +47,72 @@ class SimulationSquare:
         self.occupying_piece: SimulationPiece = None
 
 
+class JumpMoves:
+    """
+        Stateless move generator of a piece jumping to the
+        squares of a jump table (see Geometry.py). One instance
+        is shared by every piece of the type.
+    """
+    __slots__ = ('jumps',)
+
+    def __init__(self, jumps: Table):
+        self.jumps = jumps
+
+    def get_moves(self, piece: 'SimulationPiece',
+                  board: 'SimulationBoard') -> List[SimulationSquare]:
+        valid_moves = []
+        x, y = piece.pos
+        squares = board.squares
+        for index in self.jumps[y * 8 + x]:
+            target_square = squares[index]
+            target_piece = target_square.occupying_piece
+            if target_piece is None or target_piece.color != piece.color:
+                valid_moves.append(target_square)  # Move or capture
+        return valid_moves
+
+
+class SlidingMoves:
+    """
+        Stateless move generator of a piece sliding along the
+        rays of a ray table (see Geometry.py) up to the first
+        occupied square. One instance is shared by every piece
+        of the type.
+    """
+    __slots__ = ('rays',)
+
+    def __init__(self, rays: Table):
+        self.rays = rays
+
+    def get_moves(self, piece: 'SimulationPiece',
+                  board: 'SimulationBoard') -> List[SimulationSquare]:
+        valid_moves = []
+        x, y = piece.pos
+        squares = board.squares
+        for ray in self.rays[y * 8 + x]:
+            for index in ray:
+                target_square = squares[index]
+                target_piece = target_square.occupying_piece
+                if target_piece is None:
+                    valid_moves.append(target_square)  # Empty square
+                else:
+                    if target_piece.color != piece.color:
+                        valid_moves.append(target_square)  # Capture
+                    break  # Blocked
+        return valid_moves
+
+
+ROOK_MOVES = SlidingMoves(ROOK_RAYS)
+BISHOP_MOVES = SlidingMoves(BISHOP_RAYS)
+QUEEN_MOVES = SlidingMoves(QUEEN_RAYS)
+KNIGHT_MOVES = JumpMoves(KNIGHT_JUMPS)
+KING_MOVES = JumpMoves(KING_JUMPS)
+NO_MOVES = JumpMoves(EMPTY)
+
+
 class SimulationPiece:
+    __slots__ = ('pos', 'color', 'notation', 'has_moved')
+    # Move generator shared by all pieces of the type
+    moves = NO_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         self.pos = pos
@@ -26,20 +120,27 @@ class SimulationPiece:
         self.notation = ' '
         self.has_moved = False
 
+    def get_moves(self,
+                  board: 'SimulationBoard') -> List[SimulationSquare]:
+        # Pseudo-legal moves
+        return self.moves.get_moves(self, board)
+
     def get_valid_moves(self,
                         board: 'SimulationBoard') -> List[SimulationSquare]:
-        # To be implemented in specific piece subclasses
-        return []
+        return [board.get_square(to_pos)
+                for from_pos, to_pos in board.generate_moves(self.color)
+                if from_pos == self.pos]
 
 
 class SimulationPawn(SimulationPiece):
+    __slots__ = ()
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'P'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
+    def get_moves(self,
+                  board: 'SimulationBoard') -> List['SimulationSquare']:
         valid_moves = []
 
         # Determine movement direction based on the pawn's color
@@ -53,177 +154,97 @@ class SimulationPawn(SimulationPiece):
 
         # Check if the forward square is empty
         if board.is_empty(forward_pos):
-            valid_moves.append(forward_pos)
+            valid_moves.append(board.get_square(forward_pos))
+            # Unmoved pawns may also move forward by 2 squares
+            double_pos = (curr_x, curr_y + 2 * direction)
+            if not self.has_moved and board.is_empty(double_pos):
+                valid_moves.append(board.get_square(double_pos))
 
         # Pawn capturing logic (diagonal moves)
-        for diag_x in [-1, 1]:  # Diagonals (left and right)
-            diagonal_pos = (curr_x + diag_x, curr_y + direction)
-            if board.is_enemy(
-                    diagonal_pos,
-                    self.color):  # Can capture if there's an enemy piece
-                valid_moves.append(diagonal_pos)
+        squares = board.squares
+        for index in PAWN_CAPTURES[self.color][curr_y * 8 + curr_x]:
+            target_piece = squares[index].occupying_piece
+            if target_piece is not None and target_piece.color != self.color:
+                valid_moves.append(squares[index])  # Can capture an enemy piece
 
         return valid_moves
 
 
 class SimulationKnight(SimulationPiece):
+    __slots__ = ()
+    moves = KNIGHT_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'N'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
-        valid_moves = []
-        x, y = self.pos
-
-        # Knight moves (L-shape)
-        moves = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2),
-                 (-1, -2)]
-
-        for dx, dy in moves:
-            target_x = x + dx
-            target_y = y + dy
-
-            if 0 <= target_x < 8 and 0 <= target_y < 8:
-                target_square = board.get_square((target_x, target_y))
-                if target_square.occupying_piece is None or target_square.occupying_piece.color != self.color:
-                    valid_moves.append(target_square)  # Move or capture
-
-        return valid_moves
-
 
 class SimulationRook(SimulationPiece):
+    __slots__ = ()
+    moves = ROOK_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'R'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
-        valid_moves = []
-        x, y = self.pos
-
-        directions = [(1, 0), (-1, 0), (0, 1),
-                      (0, -1)]  # Right, Left, Down, Up
-
-        for dx, dy in directions:
-            for i in range(1, 8):
-                target_x = x + dx * i
-                target_y = y + dy * i
-
-                if 0 <= target_x < 8 and 0 <= target_y < 8:
-                    target_square = board.get_square((target_x, target_y))
-                    if target_square.occupying_piece is None:
-                        valid_moves.append(target_square)  # Empty square
-                    elif target_square.occupying_piece.color != self.color:
-                        valid_moves.append(target_square)  # Capture
-                        break
-                    else:
-                        break  # Blocked by own piece
-                else:
-                    break  # Out of bounds
-
-        return valid_moves
-
 
 class SimulationBishop(SimulationPiece):
+    __slots__ = ()
+    moves = BISHOP_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'B'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
-        valid_moves = []
-        x, y = self.pos
-
-        # Diagonal moves
-        directions = [(1, 1), (1, -1), (-1, 1),
-                      (-1, -1)]  # Down-Right, Up-Right, Down-Left, Up-Left
-
-        for dx, dy in directions:
-            for i in range(1, 8):
-                target_x = x + dx * i
-                target_y = y + dy * i
-
-                if 0 <= target_x < 8 and 0 <= target_y < 8:
-                    target_square = board.get_square((target_x, target_y))
-                    if target_square.occupying_piece is None:
-                        valid_moves.append(target_square)  # Empty square
-                    elif target_square.occupying_piece.color != self.color:
-                        valid_moves.append(target_square)  # Capture
-                        break
-                    else:
-                        break  # Blocked by own piece
-                else:
-                    break  # Out of bounds
-
-        return valid_moves
-
 
 class SimulationQueen(SimulationPiece):
+    __slots__ = ()
+    moves = QUEEN_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'Q'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
-        valid_moves = []
-
-        # Combine rook and bishop movements
-        rook = SimulationRook(self.pos, self.color)
-        bishop = SimulationBishop(self.pos, self.color)
-
-        valid_moves.extend(rook.get_valid_moves(board))
-        valid_moves.extend(bishop.get_valid_moves(board))
-
-        return valid_moves
-
 
 class SimulationKing(SimulationPiece):
+    __slots__ = ()
+    moves = KING_MOVES
 
     def __init__(self, pos: Tuple[int, int], color: Literal['white', 'black']):
         super().__init__(pos, color)
         self.notation = 'K'
 
-    def get_valid_moves(self,
-                        board: 'SimulationBoard') -> List['SimulationSquare']:
-        valid_moves = []
-        x, y = self.pos
 
-        # King can move one square in any direction
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1),
-                      (-1, 1), (-1, -1)]
+# Piece class per notation
+piece_classes = {'P': SimulationPawn, 'N': SimulationKnight, 'R': SimulationRook,
+                 'B': SimulationBishop, 'Q': SimulationQueen, 'K': SimulationKing}
 
-        for dx, dy in directions:
-            target_x = x + dx
-            target_y = y + dy
 
-            if 0 <= target_x < 8 and 0 <= target_y < 8:
-                target_square = board.get_square((target_x, target_y))
-                if target_square.occupying_piece is None or target_square.occupying_piece.color != self.color:
-                    valid_moves.append(target_square)  # Move or capture
-
-        return valid_moves
+# Starting position, rows from y = 0 (Black's back rank)
+START_CONFIG = [
+    ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR'],
+    ['bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP'],
+    ['', '', '', '', '', '', '', ''],
+    ['', '', '', '', '', '', '', ''],
+    ['', '', '', '', '', '', '', ''],
+    ['', '', '', '', '', '', '', ''],
+    ['wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP'],
+    ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR'],
+]
 
 
 class SimulationBoard:
+    __slots__ = ('turn', 'squares', 'move_stack', 'spare_pieces', 'castling',
+                 'hash', 'scores')
 
     def __init__(self):
-        self.config = [
-            ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR'],
-            ['bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP', 'bP'],
-            ['', '', '', '', '', '', '', ''],
-            ['', '', '', '', '', '', '', ''],
-            ['', '', '', '', '', '', '', ''],
-            ['', '', '', '', '', '', '', ''],
-            ['wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP', 'wP'],
-            ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR'],
-        ]
         self.turn: Literal['white', 'black'] = 'white'
         self.squares: List[SimulationSquare] = self.generate_squares()
+        # Undo records of the moves played with make_move
+        self.move_stack: List[tuple] = []
+        # Pieces taken off the board, reused by copy_from_board and promotions
+        self.spare_pieces: dict = {(color, notation): []
+                                   for color in ('white', 'black') for notation in 'PNBRQK'}
         self.setup_board()
 
     def generate_squares(self) -> List[SimulationSquare]:
@@ -234,12 +255,13 @@ class SimulationBoard:
         return output
 
     def get_square(self, pos) -> SimulationSquare:
-        for square in self.squares:
-            if (square.x, square.y) == (pos[0], pos[1]):
-                return square
+        # squares are stored row by row, so (x, y) lives at index y * 8 + x
+        x, y = pos
+        if 0 <= x < 8 and 0 <= y < 8:
+            return self.squares[int(y) * 8 + int(x)]
 
     def setup_board(self):
-        for y, row in enumerate(self.config):
+        for y, row in enumerate(START_CONFIG):
             for x, piece in enumerate(row):
                 if piece != '':
                     square = self.get_square((x, y))
@@ -268,6 +290,35 @@ class SimulationBoard:
 
                     square.occupying_piece.color = piece_color
 
+        self.castling = self.castling_rights()
+        self.hash = self.compute_hash()
+        # [White's score, Black's score], kept up to date by make_move
+        self.scores = compute_scores(self)
+
+    def castling_rights(self) -> int:
+        """Castling rights left by the has_moved flags of Kings and Rooks."""
+        rights = 0
+        for right, king_pos, rook_pos, color in castling_squares:
+            king = self.get_square(king_pos).occupying_piece
+            rook = self.get_square(rook_pos).occupying_piece
+            if king is not None and rook is not None \
+                and king.notation == 'K' and rook.notation == 'R' \
+                    and king.color == color and rook.color == color \
+                    and not king.has_moved and not rook.has_moved:
+                rights |= right
+        return rights
+
+    def compute_hash(self) -> int:
+        """Zobrist key of the position, make_move keeps it updated afterwards."""
+        key = CASTLING_KEYS[self.castling]
+        if self.turn == 'black':
+            key ^= SIDE_KEY
+        for index, square in enumerate(self.squares):
+            piece = square.occupying_piece
+            if piece is not None:
+                key ^= zobrist_keys[(piece.color, piece.notation)][index]
+        return key
+
     def handle_move(self, from_pos: Tuple[int, int],
                     to_pos: Tuple[int, int]) -> bool:
         from_square = self.get_square(from_pos)
@@ -275,83 +326,227 @@ class SimulationBoard:
         if from_square and from_square.occupying_piece:
             piece = from_square.occupying_piece
             if to_square in piece.get_valid_moves(self):
-                to_square.occupying_piece = piece
-                from_square.occupying_piece = None
-                piece.pos = to_pos
-                self.turn = 'white' if self.turn == 'black' else 'black'
+                self.make_move(from_pos, to_pos)
                 return True
         return False
 
+    def generate_moves(
+        self, color: Literal['white', 'black'] = None
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """Legal moves of color (default: side to move) as position pairs."""
+        if color is None:
+            color = self.turn
+        return generate_legal_moves(self, color)
+
+    def generate_captures(
+        self, color: Literal['white', 'black'] = None
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """Legal captures of color (default: side to move) as position pairs."""
+        return [(from_pos, to_pos) for from_pos, to_pos in self.generate_moves(color)
+                if self.get_square(to_pos).occupying_piece is not None]
+
+    def generate_packed_moves(self, color: Literal['white', 'black'] = None,
+                              captures_only: bool = False) -> List[int]:
+        """Legal moves (or only captures) of color as packed integers, see Move.py."""
+        moves = []
+        for from_pos, to_pos in self.generate_moves(color):
+            capture = self.get_square(to_pos).occupying_piece is not None
+            if capture or not captures_only:
+                moves.append(encode_move(from_pos, to_pos, capture))
+        return moves
+
+    def generate_packed_moves_and_check(
+            self, color: Literal['white', 'black'] = None) -> Tuple[List[int], bool]:
+        """Legal moves of color as packed integers, and whether color is in check."""
+        if color is None:
+            color = self.turn
+        moves, checkers = legal_moves_and_checkers(self, color)
+        squares = self.squares
+        return [encode_move(from_pos, to_pos,
+                            squares[to_pos[1] * 8 + to_pos[0]].occupying_piece is not None)
+                for from_pos, to_pos in moves], checkers > 0
+
+    def notation_at(self, sq: int) -> str | None:
+        piece = self.squares[sq].occupying_piece
+        return None if piece is None else piece.notation
+
     def is_in_check(self, color: Literal['white', 'black']) -> bool:
-        # Simplified check logic
-        return False
+        return is_in_check(self, color)
 
     def is_in_checkmate(self, color: Literal['white', 'black']) -> bool:
         if not self.is_in_check(color):
             return False
         # Check for no valid moves
-        return True
+        return len(self.generate_moves(color)) == 0
 
     def copy_from_board(self, board: Board):
-        # First, clear any existing squares in the SimulationBoard
-        self.squares.clear()
-
+        """
+            Copies a Game Board or SimulationBoard into this board.
+            Squares are kept and pieces come from the spare pieces
+            of the board, so copying into a board used before
+            allocates nothing new.
+        """
         # Copy basic attributes
         self.turn = board.turn
-        self.selected_square = board.selected_square  # This may need deeper copy depending on how you use it
+        self.move_stack.clear()
 
         # Loop through the original board's squares and copy the pieces
-        for square in board.squares:
-            # simulation_square = SimulationSquare(square.x, square.y, self.tile_width, self.tile_height)
-            simulation_square = SimulationSquare(square.x, square.y)
+        for simulation_square, square in zip(self.squares, board.squares):
+            if simulation_square.occupying_piece is not None:
+                self.release_piece(simulation_square.occupying_piece)
+                simulation_square.occupying_piece = None
             if square.occupying_piece:
-                piece_notation = square.occupying_piece.notation
-                piece_color = square.occupying_piece.color
-
-                if piece_notation == 'R':
-                    simulation_square.occupying_piece = SimulationRook(
-                        (square.x, square.y), piece_color)
-                elif piece_notation == 'N':
-                    simulation_square.occupying_piece = SimulationKnight(
-                        (square.x, square.y), piece_color)
-                elif piece_notation == 'B':
-                    simulation_square.occupying_piece = SimulationBishop(
-                        (square.x, square.y), piece_color)
-                elif piece_notation == 'Q':
-                    simulation_square.occupying_piece = SimulationQueen(
-                        (square.x, square.y), piece_color)
-                elif piece_notation == 'K':
-                    simulation_square.occupying_piece = SimulationKing(
-                        (square.x, square.y), piece_color)
-                elif piece_notation == 'P':
-                    simulation_square.occupying_piece = SimulationPawn(
-                        (square.x, square.y), piece_color)
-            self.squares.append(simulation_square)
-
-    def make_move(self, from_square: SimulationSquare,
-                  to_square: SimulationSquare):
-        """Make a move from one square to another on the simulation board."""
-        # Move the piece from the starting square to the destination square
-        if from_square.occupying_piece and to_square not in from_square.occupying_piece.get_valid_moves(
-                self):
-            return False  # Invalid move
-
-        # Capture the piece if the destination square has an occupying piece
-        if to_square.occupying_piece:
-            to_square.occupying_piece = None  # Remove the captured piece
-
-        # Move the piece
-        to_square.occupying_piece = from_square.occupying_piece
-        from_square.occupying_piece = None  # Clear the starting square
-
-        # Update the piece's position
-        if to_square.occupying_piece:
-            to_square.occupying_piece.pos = to_square.pos
-
-        # Switch turns
+                piece = self.take_piece(square.occupying_piece.color,
+                                        square.occupying_piece.notation,
+                                        simulation_square.pos)
+                piece.has_moved = square.occupying_piece.has_moved
+                simulation_square.occupying_piece = piece
+
+        self.castling = self.castling_rights()
+        self.hash = self.compute_hash()
+        # [White's score, Black's score], kept up to date by make_move
+        self.scores = compute_scores(self)
+
+    def take_piece(self, color: Literal['white', 'black'], notation: str,
+                   pos: Tuple[int, int]) -> SimulationPiece:
+        """A spare piece of the board if there is one, otherwise a new piece."""
+        spares = self.spare_pieces[(color, notation)]
+        if not spares:
+            return piece_classes[notation](pos, color)
+        piece = spares.pop()
+        piece.pos = pos
+        piece.has_moved = False
+        return piece
+
+    def release_piece(self, piece: SimulationPiece):
+        self.spare_pieces[(piece.color, piece.notation)].append(piece)
+
+    def make_move(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]):
+        """
+            Plays a move in place without validating it. The undo
+            record (from square, to square, moved piece, captured
+            piece, moved piece's has_moved, castling rook move,
+            Zobrist key, castling rights and scores) is pushed
+            on move_stack for unmake_move.
+        """
+        from_square = self.get_square(from_pos)
+        to_square = self.get_square(to_pos)
+        piece = from_square.occupying_piece
+        captured = to_square.occupying_piece
+        castling_rook = None
+        from_index = from_pos[1] * 8 + from_pos[0]
+        to_index = to_pos[1] * 8 + to_pos[0]
+        old_hash, old_castling, old_scores = self.hash, self.castling, \
+            self.scores
+        white, black = old_scores
+
+        key = old_hash ^ SIDE_KEY
+        key ^= zobrist_keys[(piece.color, piece.notation)][from_index]
+        if piece.color == 'white':
+            white -= piece_values[('white', piece.notation)][from_index]
+        else:
+            black -= piece_values[('black', piece.notation)][from_index]
+        if captured is not None:
+            key ^= zobrist_keys[(captured.color, captured.notation)][to_index]
+            if captured.color == 'white':
+                white -= piece_values[('white', captured.notation)][to_index]
+            else:
+                black -= piece_values[('black', captured.notation)][to_index]
+
+        from_square.occupying_piece = None
+        to_square.occupying_piece = piece
+        piece.pos = to_pos
+
+        # Pawn promotion, the pawn itself is kept in the undo record
+        if piece.notation == 'P' and to_pos[1] in (0, 7):
+            queen = self.take_piece(piece.color, 'Q', to_pos)
+            queen.has_moved = True
+            to_square.occupying_piece = queen
+
+        # Move rook if king castles
+        if piece.notation == 'K' and abs(from_pos[0] - to_pos[0]) == 2:
+            rook_x, rook_to_x = (0, 3) if to_pos[0] < from_pos[0] else (7, 5)
+            rook_square = self.get_square((rook_x, to_pos[1]))
+            rook_to_square = self.get_square((rook_to_x, to_pos[1]))
+            rook = rook_square.occupying_piece
+            castling_rook = (rook_square, rook_to_square, rook.has_moved)
+            rook_square.occupying_piece = None
+            rook_to_square.occupying_piece = rook
+            rook.pos = rook_to_square.pos
+            rook.has_moved = True
+            rook_from_index = rook_square.y * 8 + rook_square.x
+            rook_to_index = rook_to_square.y * 8 + rook_to_square.x
+            rook_keys = zobrist_keys[(rook.color, 'R')]
+            key ^= rook_keys[rook_from_index] ^ rook_keys[rook_to_index]
+            rook_values = piece_values[(rook.color, 'R')]
+            if rook.color == 'white':
+                white += rook_values[rook_to_index] - rook_values[rook_from_index]
+            else:
+                black += rook_values[rook_to_index] - rook_values[rook_from_index]
+
+        placed = to_square.occupying_piece
+        key ^= zobrist_keys[(placed.color, placed.notation)][to_index]
+        if placed.color == 'white':
+            white += piece_values[('white', placed.notation)][to_index]
+        else:
+            black += piece_values[('black', placed.notation)][to_index]
+        self.scores = [white, black]
+
+        self.move_stack.append((from_square, to_square, piece, captured,
+                                piece.has_moved, castling_rook, old_hash,
+                                old_castling, old_scores))
+        had_moved = piece.has_moved
+        piece.has_moved = True
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+        # Only a first King or Rook move, or a Rook capture, can lose rights
+        if old_castling and ((not had_moved and piece.notation in 'KR') or
+                             (captured is not None and captured.notation == 'R')):
+            self.castling = self.castling_rights()
+            key ^= CASTLING_KEYS[old_castling] ^ CASTLING_KEYS[self.castling]
+        self.hash = key
+
+    def make_packed_move(self, move: int):
+        self.make_move(SQUARE_POS[move & 63], SQUARE_POS[move >> 6 & 63])
+
+    def unmake_move(self):
+        """Takes back the last move played with make_move."""
+        from_square, to_square, piece, captured, had_moved, castling_rook, \
+            self.hash, self.castling, self.scores = self.move_stack.pop()
+
+        if to_square.occupying_piece is not piece:
+            # the Queen a pawn promoted to
+            self.release_piece(to_square.occupying_piece)
+        from_square.occupying_piece = piece
+        to_square.occupying_piece = captured
+        piece.pos = from_square.pos
+        piece.has_moved = had_moved
+
+        if castling_rook is not None:
+            rook_square, rook_to_square, rook_had_moved = castling_rook
+            rook = rook_to_square.occupying_piece
+            rook_to_square.occupying_piece = None
+            rook_square.occupying_piece = rook
+            rook.pos = rook_square.pos
+            rook.has_moved = rook_had_moved
+
         self.turn = 'black' if self.turn == 'white' else 'white'
 
-        return True  # Move was successful
+    def make_null_move(self):
+        """Passes the turn without moving, used by null-move pruning."""
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        self.hash ^= SIDE_KEY
+
+    def unmake_null_move(self):
+        self.make_null_move()
+
+    def has_non_pawn_material(self, color: Literal['white', 'black']) -> bool:
+        for square in self.squares:
+            piece = square.occupying_piece
+            if piece is not None and piece.color == color \
+                    and piece.notation not in 'PK':
+                return True
+        return False
 
     def is_empty(self, pos):
         x, y = pos
@@ -369,9 +564,7 @@ class SimulationBoard:
 
     def get_square_from_pos(self, pos: tuple[float,
                                              float]) -> SimulationSquare:
-        for square in self.squares:
-            if (square.x, square.y) == (pos[0], pos[1]):
-                return square
+        return self.get_square(pos)
 
     def get_piece_from_pos(self, pos: tuple[float, float]) -> SimulationPiece:
         return self.get_square_from_pos(pos).occupying_piece
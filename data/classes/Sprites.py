@@ -0,0 +1,27 @@
+"""
+    Sprites.py
+    ------------------------------------------
+    Process wide cache of the piece images.
+
+    Each (piece, color, size) is loaded from data/imgs and
+    scaled once. Every Board setup and every promoted Queen
+    after that reuses the same Surface, so they do no disk I/O.
+    Surfaces are only blitted, never drawn on, so sharing them
+    between pieces and boards is safe.
+"""
+
+import pygame
+from typing import Literal, Dict, Tuple
+
+sprites: Dict[Tuple[str, str, Tuple[int, int]], pygame.surface.Surface] = {}
+
+
+def get_sprite(name: str, color: Literal['white', 'black'],
+               size: Tuple[int, int]) -> pygame.surface.Surface:
+    key = (name, color, size)
+    sprite = sprites.get(key)
+    if sprite is None:
+        img_path = 'data/imgs/' + color + '_' + name + '.png'
+        sprite = pygame.transform.scale(pygame.image.load(img_path), size)
+        sprites[key] = sprite
+    return sprite
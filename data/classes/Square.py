@@ -29,8 +29,15 @@ class Square:
         self.occupying_piece: Piece = None
         self.coord = self.get_coord()
         self.highlight = False
-        self.rect = pygame.Rect(self.abs_x, self.abs_y, self.width,
-                                self.height)
+        self._rect: pygame.Rect = None
+
+    # built on first draw, so headless boards never create one
+    @property
+    def rect(self) -> pygame.Rect:
+        if self._rect is None:
+            self._rect = pygame.Rect(self.abs_x, self.abs_y, self.width,
+                                     self.height)
+        return self._rect
 
     # get the formal notation of the tile
     def get_coord(self) -> str:
@@ -0,0 +1,396 @@
+"""
+    Tablebase.py
+    ------------------------------------------
+    Distance-to-mate tablebases for KQK, KRK, KBNK and KPK,
+    generated locally by retrograde analysis.
+
+    Tables are built with the lone King black and everything
+    else white; positions with the colors the other way round
+    are flipped top to bottom before probing. A position is
+    indexed by the squares (y * 8 + x) of the white King, the
+    black King and the white pieces, 6 bits each. Generation
+    starts from the checkmates and walks moves backwards: a
+    white-to-move position is won in n + 1 plies if a white
+    move reaches a black-to-move position lost in n, and a
+    black-to-move position is lost once every black move leads
+    to a won position. KPK promotions continue in KQK.
+
+    Every table is one file of uint8 DTM values in plies
+    (255: draw), all white-to-move positions followed by all
+    black-to-move positions. Pawnless tables only keep the
+    positions with the white King on a1-d1-d4 (the others
+    are mirrors of these), so KBNK takes 5 MB. Files are
+    memory-mapped when probed.
+
+    Generate the tables (a few minutes, mostly KBNK) with:
+        python -m data.classes.Tablebase
+"""
+
+import mmap
+import os
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from data.classes.Bitboard import BitboardBoard
+from data.classes.Geometry import KING_OFFSETS, KNIGHT_OFFSETS, PAWN_OFFSETS, \
+    SLIDER_DIRECTIONS, step_table, ray_table
+
+TABLES = {'KQK': 'Q', 'KRK': 'R', 'KBNK': 'BN', 'KPK': 'P'}
+DEFAULT_DIRECTORY = 'data/tablebases'
+DRAW = 255
+
+# Order of the white pieces within a table name
+PIECE_ORDER = 'QRBNP'
+
+# White King squares kept for pawnless tables: 0 <= y <= x <= 3
+TRIANGLE = [y * 8 + x for y in range(4) for x in range(y, 4)]
+TRIANGLE_INDEX = {sq: i for i, sq in enumerate(TRIANGLE)}
+
+Position = Tuple[int, int]
+
+
+def _steps(offsets: List[Position]) -> np.ndarray:
+    # steps[d][sq] is the square one offset away, -1 off the board
+    return np.array(step_table(offsets), dtype=np.int64).T
+
+
+def _rays(directions: List[Position]) -> np.ndarray:
+    # rays[d][i][sq] is the square i + 1 steps along direction d, -1 off the board
+    rays = np.full((len(directions), 7, 64), -1, dtype=np.int64)
+    for sq, sq_rays in enumerate(ray_table(directions)):
+        for d, ray in enumerate(sq_rays):
+            rays[d, :len(ray), sq] = ray
+    return rays
+
+
+def _adjacency(steps: np.ndarray) -> np.ndarray:
+    table = np.zeros((64, 64), dtype=bool)
+    for row in steps:
+        for sq in range(64):
+            if row[sq] >= 0:
+                table[sq][row[sq]] = True
+    return table
+
+
+def _lines() -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    # lines[piece][a][b]: a and b share a line the piece slides along,
+    # between[a][b]: bitboard of the squares strictly between them
+    lines = {piece: np.zeros((64, 64), dtype=bool) for piece in SLIDER_DIRECTIONS}
+    between = np.zeros((64, 64), dtype=np.uint64)
+    for piece, directions in SLIDER_DIRECTIONS.items():
+        for d, ray in enumerate(_rays(directions)):
+            for sq in range(64):
+                passed = 0
+                for target in ray[:, sq]:
+                    if target < 0:
+                        break
+                    lines[piece][sq][target] = True
+                    between[sq][target] = passed
+                    passed |= 1 << int(target)
+    return lines, between
+
+
+KING_STEPS = _steps(KING_OFFSETS)
+KNIGHT_STEPS = _steps(KNIGHT_OFFSETS)
+SLIDER_RAYS = {piece: _rays(directions)
+               for piece, directions in SLIDER_DIRECTIONS.items()}
+KING_ADJACENT = _adjacency(KING_STEPS)
+KNIGHT_ADJACENT = _adjacency(KNIGHT_STEPS)
+# White pawns move towards y = 0
+PAWN_ATTACKS = _adjacency(_steps(PAWN_OFFSETS['white']))
+LINES, BETWEEN = _lines()
+
+BLOCK = 1 << 20
+
+
+def _squares(index: np.ndarray, count: int) -> List[np.ndarray]:
+    return [(index >> (6 * i)) & 63 for i in range(count)]
+
+
+def _occupancy(squares: List[np.ndarray]) -> np.ndarray:
+    occ = np.zeros(len(squares[0]), dtype=np.uint64)
+    for sq in squares:
+        occ |= np.left_shift(np.uint64(1), sq.astype(np.uint64))
+    return occ
+
+
+def _is_empty(occ: np.ndarray, sq: np.ndarray) -> np.ndarray:
+    return (np.right_shift(occ, sq.astype(np.uint64)) & np.uint64(1)) == 0
+
+
+def _attacked(target: np.ndarray, pieces: str, squares: List[np.ndarray],
+              occ: np.ndarray) -> np.ndarray:
+    """Where one of the white pieces (not the King) attacks target."""
+    hit = np.zeros(len(target), dtype=bool)
+    for piece, sq in zip(pieces, squares):
+        if piece == 'N':
+            hit |= KNIGHT_ADJACENT[sq, target]
+        elif piece == 'P':
+            hit |= PAWN_ATTACKS[sq, target]
+        else:
+            hit |= LINES[piece][sq, target] & \
+                ((BETWEEN[sq, target] & occ) == 0)
+    return hit
+
+
+def _analyse(pieces: str, size: int):
+    """
+        Legal positions for each side to move, black's number
+        of legal moves and the checkmates.
+    """
+    count = 2 + len(pieces)
+    valid_w = np.zeros(size, dtype=bool)
+    valid_b = np.zeros(size, dtype=bool)
+    moves_b = np.zeros(size, dtype=np.uint8)
+    mates = []
+    for start in range(0, size, BLOCK):
+        index = np.arange(start, min(start + BLOCK, size), dtype=np.int64)
+        squares = _squares(index, count)
+        white_king, black_king, piece_squares = squares[0], squares[1], squares[2:]
+
+        valid = ~KING_ADJACENT[white_king, black_king]
+        for i in range(count):
+            for j in range(i + 1, count):
+                valid &= squares[i] != squares[j]
+        for piece, sq in zip(pieces, piece_squares):
+            if piece == 'P':
+                valid &= (sq >= 8) & (sq < 56)
+        occ = _occupancy(squares)
+        check = _attacked(black_king, pieces, piece_squares, occ)
+
+        # black King moves, the King itself no longer blocks any line
+        occ_without_king = occ ^ np.left_shift(np.uint64(1),
+                                               black_king.astype(np.uint64))
+        moves = np.zeros(len(index), dtype=np.uint8)
+        for steps in KING_STEPS:
+            target = steps[black_king]
+            legal = target >= 0
+            target = np.where(legal, target, 0)
+            legal &= (target != white_king) & ~KING_ADJACENT[white_king, target]
+            legal &= ~_attacked(target, pieces, piece_squares, occ_without_king)
+            moves += legal
+
+        valid_b[index] = valid
+        valid_w[index] = valid & ~check
+        moves_b[index] = np.where(valid, moves, 0)
+        mates.append(index[valid & check & (moves == 0)])
+    return valid_w, valid_b, moves_b, np.concatenate(mates)
+
+
+def _white_unmoves(positions: np.ndarray, pieces: str) -> np.ndarray:
+    """Positions before every white move leading to positions."""
+    count = 2 + len(pieces)
+    squares = _squares(positions, count)
+    occ = _occupancy(squares)
+    output = []
+
+    def add(i, origin, legal):
+        output.append((positions + ((origin - squares[i]) << (6 * i)))[legal])
+
+    for i, piece in [(0, 'K')] + list(enumerate(pieces, 2)):
+        sq = squares[i]
+        if piece in ('K', 'N'):
+            for steps in KING_STEPS if piece == 'K' else KNIGHT_STEPS:
+                origin = steps[sq]
+                legal = origin >= 0
+                origin = np.where(legal, origin, 0)
+                legal &= _is_empty(occ, origin)
+                add(i, origin, legal)
+        elif piece == 'P':
+            # pawns came from below, two squares only from their start rank
+            y = sq >> 3
+            origin = np.minimum(sq + 8, 63)
+            single = (y <= 5) & _is_empty(occ, origin)
+            add(i, origin, single)
+            origin = np.minimum(sq + 16, 63)
+            add(i, origin, single & (y == 4) & _is_empty(occ, origin))
+        else:
+            for ray in SLIDER_RAYS[piece]:
+                clear = np.ones(len(positions), dtype=bool)
+                for step in ray:
+                    origin = step[sq]
+                    clear &= origin >= 0
+                    origin = np.where(clear, origin, 0)
+                    clear &= _is_empty(occ, origin)
+                    add(i, origin, clear)
+    return np.concatenate(output)
+
+
+def _black_unmoves(positions: np.ndarray, pieces: str) -> np.ndarray:
+    """Positions before every black King move leading to positions."""
+    squares = _squares(positions, 2 + len(pieces))
+    occ = _occupancy(squares)
+    output = []
+    for steps in KING_STEPS:
+        origin = steps[squares[1]]
+        legal = origin >= 0
+        origin = np.where(legal, origin, 0)
+        legal &= _is_empty(occ, origin)
+        output.append((positions + ((origin - squares[1]) << 6))[legal])
+    return np.concatenate(output)
+
+
+def _promotions(pieces: str, valid_w: np.ndarray, kqk_black: np.ndarray):
+    """
+        White-to-move KPK positions whose pawn promotes into a
+        lost KQK position, with the plies to mate after promoting.
+    """
+    positions = np.nonzero(valid_w)[0]
+    white_king, black_king, pawn = _squares(positions, 3)
+    target = pawn - 8
+    legal = (pawn < 16) & (target != white_king) & (target != black_king)
+    positions, target = positions[legal], target[legal]
+    queen = white_king[legal] + 64 * black_king[legal] + 4096 * target
+    plies = kqk_black[queen]
+    won = plies != DRAW
+    return positions[won], plies[won].astype(np.int64) + 1
+
+
+def generate(pieces: str, kqk_black: np.ndarray = None):
+    """
+        Builds the table of white pieces `pieces` against a lone
+        King. Returns the DTM arrays for white and for black to
+        move over all 64 ** (2 + len(pieces)) indices.
+    """
+    size = 64 ** (2 + len(pieces))
+    valid_w, valid_b, moves_b, mates = _analyse(pieces, size)
+    dtm_w = np.full(size, DRAW, dtype=np.uint8)
+    dtm_b = np.full(size, DRAW, dtype=np.uint8)
+    dtm_b[mates] = 0
+
+    promoting, promotion_plies = np.zeros(0, dtype=np.int64), np.zeros(0)
+    if 'P' in pieces:
+        promoting, promotion_plies = _promotions(pieces, valid_w, kqk_black)
+    last_promotion = promotion_plies.max() if len(promotion_plies) else 0
+
+    lost, ply = mates, 0
+    while len(lost) or ply < last_promotion:
+        # white to move wins in ply + 1 by reaching a lost position
+        won = _white_unmoves(lost, pieces)
+        won = np.concatenate([won, promoting[promotion_plies == ply + 1]])
+        won = np.unique(won[valid_w[won]])
+        won = won[dtm_w[won] == DRAW]
+        dtm_w[won] = ply + 1
+
+        # black to move loses in ply + 2 once no move is left unanswered
+        before = _black_unmoves(won, pieces)
+        before = before[valid_b[before]]
+        before, answered = np.unique(before[dtm_b[before] == DRAW],
+                                     return_counts=True)
+        moves_b[before] -= answered.astype(np.uint8)
+        lost = before[moves_b[before] == 0]
+        dtm_b[lost] = ply + 2
+        ply += 2
+    return dtm_w, dtm_b
+
+
+def _reduce(table: np.ndarray) -> np.ndarray:
+    # keep the positions with the white King on the triangle, King fastest
+    return table.reshape(-1, 64)[:, TRIANGLE].reshape(-1)
+
+
+def generate_all(directory: str = DEFAULT_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    kqk_black = None
+    for name, pieces in TABLES.items():
+        start = time.time()
+        dtm_w, dtm_b = generate(pieces, kqk_black)
+        if name == 'KQK':
+            kqk_black = dtm_b
+        if 'P' not in pieces:
+            dtm_w, dtm_b = _reduce(dtm_w), _reduce(dtm_b)
+        np.concatenate([dtm_w, dtm_b]).tofile(os.path.join(directory, name + '.bin'))
+        longest = int(dtm_w[dtm_w != DRAW].max())
+        print(f"{name}: longest mate {longest} plies, "
+              f"{len(dtm_w) + len(dtm_b)} bytes, {time.time() - start:.1f} s")
+
+
+class Tablebases:
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        self.tables: Dict[str, mmap.mmap] = {}
+        for name in TABLES:
+            path = os.path.join(directory, name + '.bin')
+            if os.path.exists(path):
+                with open(path, 'rb') as fin:
+                    self.tables[name] = mmap.mmap(fin.fileno(), 0,
+                                                  access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def pieces_of(board) -> List[Tuple[str, str, Position]]:
+        """(color, notation, position) of every piece on a search or Game Board."""
+        output = []
+        if isinstance(board, BitboardBoard):
+            for sq, code in enumerate(board.mailbox):
+                if code != -1:
+                    color, notation = board.get_piece_from_pos((sq % 8, sq // 8))
+                    output.append((color, notation, (sq % 8, sq // 8)))
+            return output
+        for square in board.squares:
+            piece = square.occupying_piece
+            if piece is not None:
+                output.append((piece.color, piece.notation, square.pos))
+        return output
+
+    def probe(self, board) -> int | None:
+        """
+            DTM in plies for the side to move: positive when it
+            mates, negative when it gets mated, 0 for a draw.
+            None when the material is not covered.
+        """
+        pieces = self.pieces_of(board)
+        strong = [piece for piece in pieces if piece[1] != 'K']
+        colors = {piece[0] for piece in strong}
+        if len(colors) == 0:
+            return 0
+        if len(colors) > 1:
+            return None
+        strong_color = colors.pop()
+        strong.sort(key=lambda piece: PIECE_ORDER.index(piece[1]))
+        notations = ''.join(piece[1] for piece in strong)
+        if notations in ('B', 'N'):
+            return 0
+        name = 'K' + notations + 'K'
+        if name not in self.tables:
+            return None
+
+        kings = {piece[0]: piece[2] for piece in pieces if piece[1] == 'K'}
+        weak_color = 'black' if strong_color == 'white' else 'white'
+        squares = [kings[strong_color], kings[weak_color]] + \
+            [piece[2] for piece in strong]
+        if strong_color == 'black':
+            # the tables have the pieces on white's side
+            squares = [(x, 7 - y) for x, y in squares]
+
+        if 'P' in notations:
+            index, size = 0, 64 ** len(squares)
+            for i, (x, y) in enumerate(squares):
+                index += (y * 8 + x) << (6 * i)
+        else:
+            x, y = squares[0]
+            if x > 3:
+                squares = [(7 - x, y) for x, y in squares]
+            if squares[0][1] > 3:
+                squares = [(x, 7 - y) for x, y in squares]
+            if squares[0][1] > squares[0][0]:
+                squares = [(y, x) for x, y in squares]
+            x, y = squares[0]
+            index, size = TRIANGLE_INDEX[y * 8 + x], len(TRIANGLE) * 64 ** (len(squares) - 1)
+            for i, (x, y) in enumerate(squares[1:]):
+                index += (y * 8 + x) * 64 ** i * len(TRIANGLE)
+
+        strong_to_move = board.turn == strong_color
+        plies = self.tables[name][index if strong_to_move else size + index]
+        if plies == DRAW:
+            return 0
+        return plies if strong_to_move else -plies
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+
+
+if __name__ == '__main__':
+    generate_all(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIRECTORY)
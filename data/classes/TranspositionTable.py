@@ -0,0 +1,52 @@
+"""
+    TranspositionTable.py
+    ------------------------------------------
+    Fixed size cache of search results keyed by Zobrist hash.
+
+    Every slot holds one entry (key, depth, bound, score,
+    best move, generation). A slot is overwritten by a search
+    at least as deep as the stored one, or by any search once
+    the stored entry is left over from an earlier move.
+"""
+
+from typing import List, Tuple
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+
+    def __init__(self, entries: int = 1 << 18):
+        assert (entries > 0)
+        self.size = entries
+        self.slots: List[tuple] = [None] * entries
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """Ages the stored entries, called once per chosen move."""
+        self.generation += 1
+
+    def probe(self, key: int) -> Tuple[int, int, float, tuple] | None:
+        """Returns (depth, bound, score, best move) stored for key."""
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: float,
+              best_move: tuple):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or depth >= entry[1] \
+                or entry[5] != self.generation:
+            self.slots[index] = (key, depth, bound, score, best_move,
+                                 self.generation)
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.probes = 0
+        self.hits = 0
@@ -0,0 +1,32 @@
+"""
+    Zobrist.py
+    ------------------------------------------
+    Zobrist keys shared by the search boards.
+
+    A position hashes to the XOR of one key per (piece, square),
+    SIDE_KEY when black is to move and one key for the castling
+    rights. Keys come from a fixed seed so SimulationBoard and
+    BitboardBoard (and anything stored on disk) agree on them.
+"""
+
+import random
+from typing import Literal, List
+
+# Castling rights, one bit each
+WHITE_KINGSIDE, WHITE_QUEENSIDE = 1, 2
+BLACK_KINGSIDE, BLACK_QUEENSIDE = 4, 8
+
+NOTATIONS = ['P', 'N', 'B', 'R', 'Q', 'K']
+
+_random = random.Random(1729753424)
+
+# PIECE_KEYS[color * 6 + piece][y * 8 + x], white = 0, pieces in NOTATIONS order
+PIECE_KEYS: List[List[int]] = [[_random.getrandbits(64) for _ in range(64)]
+                               for _ in range(12)]
+SIDE_KEY: int = _random.getrandbits(64)
+CASTLING_KEYS: List[int] = [_random.getrandbits(64) for _ in range(16)]
+
+
+def piece_keys(color: Literal['white', 'black'], notation: str) -> List[int]:
+    """Keys of a piece for every square index y * 8 + x."""
+    return PIECE_KEYS[(0 if color == 'white' else 6) + NOTATIONS.index(notation)]
@@ -12,4 +12,18 @@ class ChessAgent:
         self.color = color
 
     def choose_action(self, board: Board) -> tuple[Square, Square] | bool:
-        return False
\ No newline at end of file
+        return False
+
+    def search_stats(self) -> dict | None:
+        # Statistics of the last choose_action call, None if not recorded
+        return None
+
+    def close(self):
+        # Releases what the agent holds (worker processes, open files)
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
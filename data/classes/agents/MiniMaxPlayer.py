@@ -1,10 +1,21 @@
 # /* MinimaxPlayer.py
 
+from typing import Literal
 from data.classes.Board import Board
 from data.classes.agents.ChessAgent import ChessAgent
 from data.classes.Simulation import SimulationBoard, SimulationSquare
+from data.classes.Bitboard import BitboardBoard
+from data.classes.Evaluation import evaluate, PIECE_VALUES
+from data.classes.Move import CAPTURE, decode_move
+from data.classes.TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+from data.classes.OpeningBook import OpeningBook, DEFAULT_BOOK
+from data.classes.Tablebase import Tablebases, DEFAULT_DIRECTORY
 from data.classes.Square import Square
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
 import random
+import time
 
 color_code = {
             "black": "b",
@@ -21,45 +32,368 @@ point_map = {
             "K": 20
         }
 
+# Selective search: depth taken off a null-move search, index from which
+# quiet moves are searched one ply shallower first, and the margin a quiet
+# move at a frontier node would need to make up to matter
+NULL_MOVE_REDUCTION = 2
+LATE_MOVE_INDEX = 3
+FUTILITY_MARGIN = 200
+
+# Search board backends the agent can run minimax on
+backends = {
+            "simulation": SimulationBoard,
+            "bitboard": BitboardBoard
+        }
+
+
+class SearchTimeout(Exception):
+    # Raised inside minimax once the time budget of the move is spent
+    pass
+
+# Per process state of a root search worker, filled by init_root_worker
+root_worker = {}
+
+def init_root_worker(color, backend, tt_entries, search_options, shared_best):
+    root_worker["player"] = MinimaxPlayer(color, backend, tt_entries,
+                                          opening_book=None, tablebases=None,
+                                          **search_options)
+    root_worker["best"] = shared_best
+    root_worker["search"] = None
+
+def search_root_move(sim_board, move, depth, search, deadline):
+    """
+        Searches one root move in a worker process. The best
+        score found by any worker so far is the alpha bound, so
+        moves that cannot beat it are cut off early. Returns the
+        score and the alpha it was searched with: a score at or
+        below that alpha is only an upper bound.
+    """
+    player = root_worker["player"]
+    shared_best = root_worker["best"]
+    if root_worker["search"] != search:
+        player.transposition_table.new_search()
+        root_worker["search"] = search
+        player.reset_search_stats()
+    player.deadline = deadline
+    alpha = shared_best.value
+    stats_before = dict(player.stats)
+    sim_board.make_packed_move(move)
+    value = player.minimax(sim_board,
+                           depth=depth,
+                           alpha=alpha,
+                           beta=float('inf'),
+                           maximizing_player=False)
+    with shared_best.get_lock():
+        if value > shared_best.value:
+            shared_best.value = value
+    stats = {key: player.stats[key] - stats_before[key] for key in stats_before}
+    return value, alpha, stats
+
 class MinimaxPlayer(ChessAgent):
+    def __init__(self, color: Literal['white', 'black'],
+                 backend: Literal['simulation', 'bitboard'] = 'simulation',
+                 tt_entries: int = 1 << 18,
+                 workers: int = 1,
+                 depth: int = 3,
+                 time_budget: float = None,
+                 max_depth: int = 64,
+                 quiescence: bool = True,
+                 null_move: bool = True,
+                 late_move_reductions: bool = True,
+                 futility_pruning: bool = True,
+                 opening_book: str = DEFAULT_BOOK,
+                 tablebases: str = DEFAULT_DIRECTORY,
+                 search_stats: bool = False):
+        super().__init__(color)
+        assert (backend in backends)
+        assert (workers > 0)
+        assert (depth > 0 and max_depth > 0)
+        self.backend = backend
+        self.tt_entries = tt_entries
+        self.transposition_table = TranspositionTable(tt_entries)
+        # workers > 1 splits the root moves over a process pool
+        self.workers = workers
+        self.pool = None
+        self.search_board = None
+        self.shared_best = None
+        # Without a time budget every move is searched to `depth`. With one,
+        # iterative deepening goes on until the budget (seconds) runs out
+        # or max_depth is reached.
+        self.depth = depth
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.deadline = None
+        self.completed_depth = 0
+        # Resolve captures at the leaves instead of evaluating mid exchange
+        self.use_quiescence = quiescence
+        self.use_null_move = null_move
+        self.use_late_move_reductions = late_move_reductions
+        self.use_futility_pruning = futility_pruning
+        # Book moves are played without searching, None turns the book off
+        self.opening_book = None
+        if opening_book is not None and os.path.exists(opening_book):
+            self.opening_book = OpeningBook(opening_book)
+        # Endgames covered by the generated tablebases are played without searching
+        self.tablebases = None
+        if tablebases is not None:
+            self.tablebases = Tablebases(tablebases)
+            if not self.tablebases.tables:
+                self.tablebases = None
+        # Per move statistics for the match outcome, see move_stats
+        self.record_stats = search_stats
+        self.last_stats = None
+        self.reset_search_stats()
+
+    def reset_search_stats(self):
+        # Move ordering state and counters, kept for one chosen move
+        self.killers = {}
+        self.history = {}
+        self.stats = {"nodes": 0, "quiescence_nodes": 0, "cutoffs": 0,
+                      "first_move_cutoffs": 0, "null_move_cutoffs": 0,
+                      "reductions": 0, "re_searches": 0, "futility_prunes": 0,
+                      "evaluations": 0, "tt_probes": 0, "tt_hits": 0}
+
+    def first_move_cutoff_rate(self) -> float:
+        # Share of cutoffs caused by the first move searched, near 1 when ordering works
+        if self.stats["cutoffs"] == 0:
+            return 0.0
+        return self.stats["first_move_cutoffs"] / self.stats["cutoffs"]
+
+    def move_stats(self, source: Literal['tablebase', 'book', 'search']) -> dict:
+        """
+            Counters of the last chosen move with the depth reached,
+            the effective branching factor (nodes ** (1 / depth))
+            and the transposition table hit rate.
+        """
+        stats = dict(self.stats)
+        depth = self.completed_depth
+        stats["source"] = source
+        stats["depth"] = depth
+        stats["first_move_cutoff_rate"] = round(self.first_move_cutoff_rate(), 3)
+        stats["branching_factor"] = round(stats["nodes"] ** (1 / depth), 2) if depth else 0.0
+        stats["tt_hit_rate"] = round(stats["tt_hits"] / stats["tt_probes"], 3) \
+            if stats["tt_probes"] else 0.0
+        return stats
+
+    def search_stats(self) -> dict | None:
+        return self.last_stats
+
+    def search_options(self) -> dict:
+        # Search switches handed on to the root workers' players
+        return {"quiescence": self.use_quiescence,
+                "null_move": self.use_null_move,
+                "late_move_reductions": self.use_late_move_reductions,
+                "futility_pruning": self.use_futility_pruning}
+
     @staticmethod
     def translate_simulation_square_to_square(sim_square: SimulationSquare, board: Board) -> Square:
         position = sim_square.pos
         return board.get_square_from_pos(position)
 
-    def choose_action(self, board: Board, verbose: bool = True):
+    def create_search_board(self, board: Board) -> SimulationBoard | BitboardBoard:
+        # One search board per player, copied into on every move
+        if self.search_board is None:
+            self.search_board = backends[self.backend]()
+        self.search_board.copy_from_board(board)
+        return self.search_board
+
+    def choose_action(self, board: Board, verbose: bool = False):
+        # verbose prints the cutoff counts of the search, off in matches
         best_move = None
-        best_value = float('-inf')
 
-        sim_board = SimulationBoard()
-        sim_board.copy_from_board(board)
+        sim_board = self.create_search_board(board)
+        self.transposition_table.new_search()
+        self.reset_search_stats()
+        self.completed_depth = 0
+        self.last_stats = None
         possible_move = self.get_all_possible_moves(sim_board, self.color)
 
+        if self.tablebases is not None:
+            tablebase_move = self.tablebase_move(sim_board, possible_move)
+            if tablebase_move is not None:
+                if self.record_stats:
+                    self.last_stats = self.move_stats('tablebase')
+                return self.to_action(board, tablebase_move)
+
+        # Known opening positions are answered from the book
+        if self.opening_book is not None:
+            book_move = self.opening_book.choose(sim_board.hash)
+            for move in possible_move:
+                if decode_move(move) == book_move:
+                    if self.record_stats:
+                        self.last_stats = self.move_stats('book')
+                    return self.to_action(board, move)
+
         random.shuffle(possible_move)
 
+        # Iterative deepening, depth 1 always completes so there is a move
+        if self.time_budget is None:
+            deadline, max_depth = None, self.depth
+        else:
+            deadline, max_depth = time.time() + self.time_budget, self.max_depth
+        for depth in range(1, max_depth + 1):
+            self.deadline = deadline if best_move is not None else None
+            try:
+                if self.workers > 1:
+                    move = self.parallel_root_search(sim_board, possible_move,
+                                                     depth, self.deadline)
+                else:
+                    move = self.root_search(sim_board, possible_move, depth)
+            except SearchTimeout:
+                break
+            if move is None:
+                # every move loses, keep the last found one
+                break
+            best_move = move
+            self.completed_depth = depth
+
+            # This iteration's best move is searched first in the next one
+            possible_move.remove(best_move)
+            possible_move.insert(0, best_move)
+            if deadline is not None and time.time() >= deadline:
+                break
+        self.deadline = None
+
+        if verbose:
+            print("cutoffs: ", self.stats["cutoffs"],
+                  "first move cutoff rate: ", round(self.first_move_cutoff_rate(), 3))
+        if self.record_stats:
+            self.last_stats = self.move_stats('search')
+
+        # Convert the best move to Game Board Squares before returning
+        if best_move is not None:
+            return self.to_action(board, best_move)
+
+        return False
+
+    def capture_points(self, board: SimulationBoard | BitboardBoard, move: int) -> int:
+        # Points of the piece a move captures, looked up before the move is played
+        if move & CAPTURE:
+            return point_map[board.notation_at(move >> 6 & 63)]
+        return point_map[" "]
+
+    def to_action(self, board: Board, move: int) -> tuple[Square, Square, int]:
+        # Points are read off the Game Board, which the search never changes
+        from_pos, to_pos = decode_move(move)
+        to_square = board.get_square_from_pos(to_pos)
+        captured = to_square.occupying_piece
+        return (board.get_square_from_pos(from_pos),
+                to_square,
+                point_map[captured.notation] if captured is not None else point_map[" "])
+
+    def tablebase_move(self, sim_board: SimulationBoard | BitboardBoard,
+                       possible_move: list):
+        """
+            Fastest mate when winning, a draw when there is one,
+            otherwise the slowest loss. None if the tablebases do
+            not cover the position.
+        """
+        if not possible_move or self.tablebases.probe(sim_board) is None:
+            return None
+        best_move, best_key = None, None
+        for move in possible_move:
+            sim_board.make_packed_move(move)
+            plies = self.tablebases.probe(sim_board)
+            mated = plies == 0 and sim_board.is_in_checkmate(sim_board.turn)
+            sim_board.unmake_move()
+            if plies is None:
+                continue
+            if mated:
+                key = (3, 0)
+            elif plies < 0:
+                key = (2, plies)
+            elif plies == 0:
+                key = (1, 0)
+            else:
+                key = (0, plies)
+            if best_key is None or key > best_key:
+                best_key = key
+                best_move = move
+        return best_move
+
+    def root_search(self, sim_board: SimulationBoard | BitboardBoard,
+                    possible_move: list, depth: int):
+        """
+            Searches the root moves in order and returns the best
+            one, or None.
+        """
+        best_move = None
+        best_value = float('-inf')
+        # The search plays every move on sim_board and takes it back afterwards
         for move in possible_move:
-            sim_board.handle_move(move['curr_pos'], move['next_pos'])
-            move_value = self.minimax(sim_board, 
-                                      depth=3, 
-                                      alpha=float('-inf'), 
-                                      beta=float('inf'), 
-                                      maximizing_player=False)
+            sim_board.make_packed_move(move)
+            try:
+                # moves that cannot beat the best so far fail low
+                move_value = self.minimax(sim_board,
+                                          depth=depth,
+                                          alpha=best_value,
+                                          beta=float('inf'),
+                                          maximizing_player=False)
+            finally:
+                # a SearchTimeout leaves sim_board as it was before the search
+                sim_board.unmake_move()
             if move_value > best_value:
                 best_value = move_value
-                best_move = (move['start'], move['end'], move["points"])
-        
-        # Convert the best move's SimulationSquare to Square before returning
-        if best_move:
-            start_square = self.translate_simulation_square_to_square(best_move[0], board)
-            end_square = self.translate_simulation_square_to_square(best_move[1], board)
-            return (start_square, end_square, best_move[2])
+                best_move = move
+        return best_move
 
-        return False
+    def parallel_root_search(self, sim_board: SimulationBoard | BitboardBoard,
+                             possible_move: list, depth: int,
+                             deadline: float = None):
+        """
+            Hands every root move to the worker pool and returns
+            the best one, or None.
+        """
+        if self.pool is None:
+            self.shared_best = multiprocessing.Value('d', float('-inf'))
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_root_worker,
+                initargs=(self.color, self.backend, self.tt_entries,
+                          self.search_options(), self.shared_best))
+        # The workers hold this Value since the pool started, it is reset
+        # in place so every search shares the same one
+        with self.shared_best.get_lock():
+            self.shared_best.value = float('-inf')
+
+        futures = [self.pool.submit(search_root_move, sim_board, move, depth,
+                                    self.transposition_table.generation,
+                                    deadline)
+                   for move in possible_move]
 
-    def print_possible_moves(self, possible_moves):
+        best_move = None
+        best_value = float('-inf')
+        for move, future in zip(possible_move, futures):
+            try:
+                move_value, alpha, stats = future.result()
+            except SearchTimeout:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            for key in stats:
+                self.stats[key] += stats[key]
+            # a score at or below the alpha it was searched with is a bound
+            if move_value > alpha and move_value > best_value:
+                best_value = move_value
+                best_move = move
+        return best_move
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+        if self.tablebases is not None:
+            self.tablebases.close()
+            self.tablebases = None
+
+    def print_possible_moves(self, board: SimulationBoard | BitboardBoard, possible_moves: list):
         print("\n*********************************")
         print("============== MOVES ==============\n")
-        for move in possible_moves:
+        for packed_move in possible_moves:
+                move = self.describe_move(board, packed_move)
                 print("-----------------------------")
                 print("curr_pos: ", move["curr_pos"])
                 print("curr_piece", move["curr_piece_color"], move["curr_piece_notation"])
@@ -69,266 +403,264 @@ class MinimaxPlayer(ChessAgent):
                 print("points: ", move["points"])
         print()
     
-    def evaluate_board(self, board: Board):
-        point_map = {
-            "P": 1,
-            "N": 3,
-            "B": 3,
-            "R": 5,
-            "Q": 9,
-            "K": 0  # King should not be considered for evaluation
+    def evaluate_board(self, board: SimulationBoard | BitboardBoard):
+        # Both search boards keep running material and piece-square scores
+        self.stats["evaluations"] += 1
+        return evaluate(board, self.color)
+
+    def get_all_possible_moves(self, board: SimulationBoard | BitboardBoard, color: str,
+                               captures_only: bool = False) -> list[int]:
+        # Generated moves are legal and packed, see Move.py
+        return board.generate_packed_moves(color, captures_only)
+
+    def describe_move(self, board: SimulationBoard | BitboardBoard, move: int) -> dict:
+        """Dictionary view of a packed move, only built for debugging output."""
+        curr_pos, next_pos = decode_move(move)
+        curr_sq, next_sq = move & 63, move >> 6 & 63
+        if isinstance(board, BitboardBoard):
+            curr_color = board.get_piece_from_pos(curr_pos)[0]
+            next_piece = board.get_piece_from_pos(next_pos)
+            next_color = next_piece[0] if next_piece else None
+        else:
+            curr_color = board.get_square(curr_pos).occupying_piece.color
+            next_piece = board.get_square(next_pos).occupying_piece
+            next_color = next_piece.color if next_piece else None
+        return {
+            "curr_pos": curr_pos,
+            "curr_piece_color": color_code[curr_color],
+            "curr_piece_notation": board.notation_at(curr_sq),
+            "next_pos": next_pos,
+            "next_piece_color": color_code[next_color] if next_color else None,
+            "next_piece_notation": board.notation_at(next_sq),
+            "can_capture": bool(move & CAPTURE),
+            "points": self.capture_points(board, move)
         }
 
-        score = 0
-        for square in board.squares:
-            if square.occupying_piece:
-                piece = square.occupying_piece
-                piece_value = point_map.get(piece.notation.upper(), 0)
-                score += piece_value if piece.color == self.color else -piece_value
-
-        return score
-
-    def get_all_possible_moves(self, board: SimulationBoard, color: str):
-        possible_moves = []
-
-        checkmate_status = self.is_in_checkmate(board, color)
-        check_status,threat_piece = self.is_in_check(board,color)
-
-        # check if board is in checkmate
-        if checkmate_status:
-            return []
-        elif check_status:
-            # Case 1: No other Piece can capture the threatening piece
-            # Case 2: Other piece can capture the threatening piece
-
-            #TODO: Current limitation is that when king is under check
-            # and any other piece can capture the threatening piece or
-            # block it from directly attacking the King, it is not detected
-            # instead the King tries to save himself by moving
-            # which also leads to Invalid moves in certain cases
-
-            king_defenses = self.exit_check_with_king_move(board, color)
-            other_defenses = self.exit_check_with_piece_move(board, color, threat_piece)
-
-            defenses = king_defenses
-            defenses.extend(other_defenses)
-            return defenses
-
-        # general case
-        for square in board.squares:
-            if square.occupying_piece is not None:
-                if square.occupying_piece.notation != ' ':
-                    if square.occupying_piece.color == color:
-                        for target in square.occupying_piece.get_valid_moves(board):
-                            can_capture = False
-                            points = point_map[" "]
-
-                            if not isinstance(target,SimulationSquare):
-                                target_square = board.get_square(target)
-                            else:
-                                target_square = target
-
-                            if target_square.occupying_piece != None:
-                                if target_square.occupying_piece.color != self.color:
-                                    can_capture = True
-                                    points = point_map[target_square.occupying_piece.notation]
-
-                            possible_moves.append({
-                                "start":square,
-                                "curr_pos": square.pos,
-                                "curr_piece_color": color_code[square.occupying_piece.color] if square.occupying_piece else None,
-                                "curr_piece_notation": square.occupying_piece.notation if square.occupying_piece else None,
-                                "end": target_square,
-                                "next_pos": target_square.pos,
-                                "next_piece_color": color_code[target_square.occupying_piece.color] if target_square.occupying_piece else None,
-                                "next_piece_notation": target_square.occupying_piece.notation if target_square.occupying_piece else None,
-                                "can_capture":can_capture,
-                                "points": points
-                            })
-        return possible_moves
-
     def get_opponent_color(self):
         return "black" if self.color == "white" else "white"
+
+    def order_moves(self, board: SimulationBoard | BitboardBoard, possible_moves: list,
+                    color: str, ply: int, tt_move: int = None):
+        """
+            Sorts moves in place: the stored best move, captures by
+            most valuable victim / least valuable attacker, the
+            killer moves of this ply, then quiet moves by history
+            score. Moves are shuffled first, so ties are broken at random.
+        """
+        killers = self.killers.get(ply, ())
+        history = self.history
+        notation_at = board.notation_at
+
+        def order_key(move):
+            if move == tt_move:
+                return (3, 0)
+            if move & CAPTURE:
+                return (2, PIECE_VALUES[notation_at(move >> 6 & 63)] * 10
+                        - PIECE_VALUES[notation_at(move & 63)])
+            if move in killers:
+                return (1, 0)
+            return (0, history.get((color, move), 0))
+
+        random.shuffle(possible_moves)
+        possible_moves.sort(key=order_key, reverse=True)
+
+    def record_cutoff(self, move: int, color: str, depth: int, ply: int, index: int):
+        self.stats["cutoffs"] += 1
+        if index == 0:
+            self.stats["first_move_cutoffs"] += 1
+        if move & CAPTURE:
+            return
+        # Quiet moves that cut off are tried early at the same ply and elsewhere
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        history_key = (color, move)
+        self.history[history_key] = self.history.get(history_key, 0) + depth * depth
     
-    def minimax(self, board: SimulationBoard, depth: int, alpha: int, beta: int, maximizing_player: bool) -> int:
+    def is_late_move(self, move: int, index: int, depth: int, ply: int, in_check: bool) -> bool:
+        # Quiet moves ordered after the captures, killers and first few history moves
+        return self.use_late_move_reductions and index >= LATE_MOVE_INDEX \
+            and depth >= 3 and not in_check and not move & CAPTURE \
+            and move not in self.killers.get(ply, ())
+
+    def minimax(self, board: SimulationBoard, depth: int, alpha: int, beta: int, maximizing_player: bool, ply: int = 1,
+                allow_null: bool = True) -> int:
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout()
+        self.stats["nodes"] += 1
+
         if depth == 0:
+            if self.use_quiescence:
+                return self.quiescence(board, alpha, beta, maximizing_player)
             return self.evaluate_board(board)
 
+        # Reuse what an earlier search found for this position
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        entry = self.transposition_table.probe(board.hash)
+        self.stats["tt_probes"] += 1
+        if entry is not None:
+            self.stats["tt_hits"] += 1
+            tt_depth, bound, score, tt_move = entry
+            if tt_depth >= depth:
+                if bound == EXACT:
+                    return score
+                elif bound == LOWER:
+                    alpha = max(alpha, score)
+                elif bound == UPPER:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+
         # Determine the color for the current maximizing or minimizing player
         color = self.color if maximizing_player else self.get_opponent_color()
 
-        # Get all possible moves for the current player
-        possible_moves = self.get_all_possible_moves(board, color)
-        random.shuffle(possible_moves)
+        # Null move: if passing the turn still holds the bound, a real move will
+        # too. Skipped in check and without pieces, where passing is no guide.
+        if self.use_null_move and allow_null \
+                and depth > NULL_MOVE_REDUCTION \
+                and (beta < float('inf') if maximizing_player else alpha > float('-inf')) \
+                and board.has_non_pawn_material(color) \
+                and not board.is_in_check(color):
+            board.make_null_move()
+            try:
+                if maximizing_player:
+                    eval = self.minimax(board, depth - 1 - NULL_MOVE_REDUCTION, beta - 1, beta,
+                                        False, ply + 1, allow_null=False)
+                else:
+                    eval = self.minimax(board, depth - 1 - NULL_MOVE_REDUCTION, alpha, alpha + 1,
+                                        True, ply + 1, allow_null=False)
+            finally:
+                board.unmake_null_move()
+            if maximizing_player and eval >= beta:
+                self.stats["null_move_cutoffs"] += 1
+                return beta
+            if not maximizing_player and eval <= alpha:
+                self.stats["null_move_cutoffs"] += 1
+                return alpha
+
+        # Get all possible moves for the current player, likely cutoffs first.
+        # The move generator finds out on the way whether the player is in
+        # check, which futility pruning and late move reductions need.
+        possible_moves, in_check = board.generate_packed_moves_and_check(color)
+        self.order_moves(board, possible_moves, color, ply, tt_move)
+
+        # Futility: one ply from the leaves, quiet moves are skipped when even
+        # a margin on top of the static evaluation cannot reach the bound
+        futility_value = None
+        if self.use_futility_pruning and depth == 1 and not in_check:
+            static_eval = self.evaluate_board(board)
+            if maximizing_player and static_eval + FUTILITY_MARGIN <= alpha:
+                futility_value = static_eval + FUTILITY_MARGIN
+            elif not maximizing_player and static_eval - FUTILITY_MARGIN >= beta:
+                futility_value = static_eval - FUTILITY_MARGIN
 
+        best_move = None
         if maximizing_player:
             max_eval = float('-inf')
-            for move in possible_moves:
-                board_copy = SimulationBoard()
-                board_copy.copy_from_board(board)
-                board_copy.handle_move(move['curr_pos'], move['next_pos'])
-                eval = self.minimax(board_copy, depth - 1, alpha, beta, False)  # Recurse with minimizing player
+            for i, move in enumerate(possible_moves):
+                if futility_value is not None and not move & CAPTURE:
+                    self.stats["futility_prunes"] += 1
+                    max_eval = max(max_eval, futility_value)
+                    continue
+                board.make_packed_move(move)
+                try:
+                    if self.is_late_move(move, i, depth, ply, in_check) and alpha > float('-inf'):
+                        # Reduced null window search, searched again in full if it beats alpha
+                        self.stats["reductions"] += 1
+                        eval = self.minimax(board, depth - 2, alpha, alpha + 1, False, ply + 1)
+                        if eval > alpha:
+                            self.stats["re_searches"] += 1
+                            eval = self.minimax(board, depth - 1, alpha, beta, False, ply + 1)
+                    else:
+                        eval = self.minimax(board, depth - 1, alpha, beta, False, ply + 1)  # Recurse with minimizing player
+                finally:
+                    board.unmake_move()
+                if eval > max_eval or best_move is None:
+                    best_move = move
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, color, depth, ply, i)
                     break  # Beta cut-off
-            return max_eval
+            value = max_eval
         else:
             min_eval = float('inf')
-            for move in possible_moves:
-                board_copy = SimulationBoard()
-                board_copy.copy_from_board(board)
-                board_copy.handle_move(move['curr_pos'], move['next_pos'])
-                eval = self.minimax(board_copy, depth - 1, alpha, beta, True)  # Recurse with maximizing player
+            for i, move in enumerate(possible_moves):
+                if futility_value is not None and not move & CAPTURE:
+                    self.stats["futility_prunes"] += 1
+                    min_eval = min(min_eval, futility_value)
+                    continue
+                board.make_packed_move(move)
+                try:
+                    if self.is_late_move(move, i, depth, ply, in_check) and beta < float('inf'):
+                        # Reduced null window search, searched again in full if it beats beta
+                        self.stats["reductions"] += 1
+                        eval = self.minimax(board, depth - 2, beta - 1, beta, True, ply + 1)
+                        if eval < beta:
+                            self.stats["re_searches"] += 1
+                            eval = self.minimax(board, depth - 1, alpha, beta, True, ply + 1)
+                    else:
+                        eval = self.minimax(board, depth - 1, alpha, beta, True, ply + 1)  # Recurse with maximizing player
+                finally:
+                    board.unmake_move()
+                if eval < min_eval or best_move is None:
+                    best_move = move
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, color, depth, ply, i)
                     break  # Alpha cut-off
-            return min_eval
+            value = min_eval
 
-    def is_in_check(self, board: SimulationBoard, color: str) -> bool:
-        """
-        Returns True if the player with the given color is in check.
-        """
-        king_square = None
-        for square in board.squares:
-            if square.occupying_piece and \
-                square.occupying_piece.color == color and \
-                    square.occupying_piece.notation == 'K':
-                king_square = square
-                break
+        if value <= alpha_orig:
+            bound = UPPER
+        elif value >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transposition_table.store(board.hash, depth, bound, value, best_move)
+        return value
 
-        if king_square:
-            # Check if any opposing piece can move to the king's position
-            opponent_color = self.get_opponent_color() if color == self.color else self.color
-            for square in board.squares:
-                if square.occupying_piece and square.occupying_piece.color == opponent_color:
-                    valid_moves = square.occupying_piece.get_valid_moves(board)
-                    if king_square in valid_moves:
-                        return True, square
-        return False, None
-
-    def is_in_checkmate(self, board: SimulationBoard, color: str) -> bool:
+    def quiescence(self, board: SimulationBoard, alpha: int, beta: int, maximizing_player: bool) -> int:
         """
-        Returns True if the player with the given color is in checkmate.
+            Captures-only search below the leaves. The side to move
+            may stand pat on the static evaluation, so only captures
+            that improve on it are followed.
         """
-        is_checked = False
-        king_square = None
-        for square in board.squares:
-            if square.occupying_piece and \
-                square.occupying_piece.color == color and \
-                    square.occupying_piece.notation == 'K':
-                king_square = square
-                break
-
-        if king_square:
-            # Check if any opposing piece can move to the king's position
-            opponent_color = self.get_opponent_color() if color == self.color else self.color
-            for square in board.squares:
-                if square.occupying_piece and square.occupying_piece.color == opponent_color:
-                    valid_moves = square.occupying_piece.get_valid_moves(board)
-                    if king_square in valid_moves:
-                        is_checked = True
-        
-        if is_checked == False:
-            return False
-    
-        # return safe moves
-        safe_moves = []
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout()
+        self.stats["quiescence_nodes"] += 1
 
-        king_square = self.get_king(board, color)
-        kings_moves = king_square.occupying_piece.get_valid_moves(board)
-
-
-        all_opponent_moves = []
-        for square in board.squares:
-            if square.occupying_piece is not None:
-                if square.occupying_piece.color != color:
-                    # look for opponent pieces only
-                    all_opponent_moves.append(square.occupying_piece.get_valid_moves(board))
-
-        for move in kings_moves:
-            if move not in all_opponent_moves:
-                safe_moves.append(move)
-
-        if len(safe_moves)==0:
-            return True
-        return False
-
-    def get_king(self, board: SimulationBoard, color):
-        for square in board.squares:
-            if square.occupying_piece is not None:
-                if square.occupying_piece.notation == 'K' and \
-                    square.occupying_piece.color == color:
-                    return square
-    
-    def exit_check_with_king_move(self, board: SimulationBoard, color):
-            safe_moves = []
-
-            king_square = self.get_king(board, color)
-            kings_moves = king_square.occupying_piece.get_valid_moves(board)
-
-            all_opponent_moves = []
-            for square in board.squares:
-                if square.occupying_piece is not None:
-                    if square.occupying_piece.color != color:
-                        # look for opponent pieces only
-                        moves_list = square.occupying_piece.get_valid_moves(board)
-                        all_opponent_moves.extend(moves_list)
-
-            for move in kings_moves:
-                if move not in all_opponent_moves:
-                    can_capture = False
-                    points = point_map[" "]
-
-                    # check if the move leads to any captures
-                    if move.occupying_piece is not None:
-                        if move.occupying_piece.color != self.color:
-                            can_capture = True
-                            points = point_map[move.occupying_piece.notation]
-
-                    safe_moves.append({
-                                "start":king_square,
-                                "curr_pos": king_square.pos,
-                                "curr_piece_color": color_code[king_square.occupying_piece.color] if king_square.occupying_piece else None,
-                                "curr_piece_notation": king_square.occupying_piece.notation if king_square.occupying_piece else None,
-                                "end": move,
-                                "next_pos": move.pos,
-                                "next_piece_color": color_code[move.occupying_piece.color] if move.occupying_piece else None,
-                                "next_piece_notation": move.occupying_piece.notation if move.occupying_piece else None,
-                                "can_capture":can_capture,
-                                "points": points
-                            })
-
-            # print("safe moves:", [(move["curr_pos"], move["next_pos"]) for move in safe_moves])
-
-            return safe_moves
-
-    def exit_check_with_piece_move(self,
-                                        board: SimulationBoard,
-                                        color,
-                                        threat_piece: SimulationSquare):
-    
-        # TODO: This method is incomplete because Defense List is returned as empty
-
-        threat_moves = threat_piece.occupying_piece.get_valid_moves(board)
-
-        # print(threat_piece.occupying_piece.notation)
-        # print("threat_moves:" , [(threat_piece.occupying_piece.pos, move.pos) for move in threat_moves])
-
-        defense_moves = []
-        all_possible_moves = []
-        for square in board.squares:
-            if square.occupying_piece is not None:
-                if square.occupying_piece.notation != ' ' and \
-                    square.occupying_piece.notation != "K" and \
-                        square.occupying_piece.color == color:
-                    all_possible_moves.extend(square.occupying_piece.get_valid_moves(board))
-        
-        for defense in defense_moves:
-            if defense in threat_moves:
-                defense_moves.append(defense)    
-
-        # print("defense moves:", [(move["curr_pos"], move["next_pos"]) for move in defense_moves])
-
-        return defense_moves
+        stand_pat = self.evaluate_board(board)
+        if maximizing_player:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            color = self.color
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+            color = self.get_opponent_color()
+
+        captures = self.get_all_possible_moves(board, color, captures_only=True)
+        self.order_moves(board, captures, color, 0)
+
+        value = stand_pat
+        for move in captures:
+            board.make_packed_move(move)
+            try:
+                eval = self.quiescence(board, alpha, beta, not maximizing_player)
+            finally:
+                board.unmake_move()
+            if maximizing_player:
+                value = max(value, eval)
+                alpha = max(alpha, eval)
+            else:
+                value = min(value, eval)
+                beta = min(beta, eval)
+            if beta <= alpha:
+                break
+        return value
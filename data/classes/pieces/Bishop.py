@@ -1,48 +1,14 @@
 # /* Bishop.py
 
-import pygame
+from data.classes.Geometry import BISHOP_RAYS
 from data.classes.Piece import Piece
+from data.classes.Sprites import get_sprite
 
 class Bishop(Piece):
+    rays = BISHOP_RAYS
+
     def __init__(self, pos, color, board):
         super().__init__(pos, color, board)
-        img_path = 'data/imgs/' + color + '_bishop.png'
-        self.img = pygame.image.load(img_path)
-        self.img = pygame.transform.scale(self.img, (board.tile_width - 20, board.tile_height - 20))
-        self.notation = 'B'
-
-    def get_possible_moves(self, board):
-        output = []
-        moves_ne = []
-        for i in range(1, 8):
-            if self.x + i > 7 or self.y - i < 0:
-                break
-            moves_ne.append(board.get_square_from_pos(
-                (self.x + i, self.y - i)
-            ))
-        output.append(moves_ne)
-        moves_se = []
-        for i in range(1, 8):
-            if self.x + i > 7 or self.y + i > 7:
-                break
-            moves_se.append(board.get_square_from_pos(
-                (self.x + i, self.y + i)
-            ))
-        output.append(moves_se)
-        moves_sw = []
-        for i in range(1, 8):
-            if self.x - i < 0 or self.y + i > 7:
-                break
-            moves_sw.append(board.get_square_from_pos(
-                (self.x - i, self.y + i)
-            ))
-        output.append(moves_sw)
-        moves_nw = []
-        for i in range(1, 8):
-            if self.x - i < 0 or self.y - i < 0:
-                break
-            moves_nw.append(board.get_square_from_pos(
-                (self.x - i, self.y - i)
-            ))
-        output.append(moves_nw)
-        return output
\ No newline at end of file
+        if not board.headless:
+            self.img = get_sprite('bishop', color, (board.tile_width - 20, board.tile_height - 20))
+        self.notation = 'B'
\ No newline at end of file
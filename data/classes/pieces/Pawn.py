@@ -1,15 +1,13 @@
 # /* Pawn.py
 
-import pygame
-
 from data.classes.Piece import Piece
+from data.classes.Sprites import get_sprite
 
 class Pawn(Piece):
     def __init__(self, pos, color, board):
         super().__init__(pos, color, board)
-        img_path = 'data/imgs/' + color + '_pawn.png'
-        self.img = pygame.image.load(img_path)
-        self.img = pygame.transform.scale(self.img, (board.tile_width - 35, board.tile_height - 35))
+        if not board.headless:
+            self.img = get_sprite('pawn', color, (board.tile_width - 35, board.tile_height - 35))
         self.notation = 'P'
 
     def get_possible_moves(self, board):